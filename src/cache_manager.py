@@ -3,15 +3,28 @@
 """
 import os
 import json
+import time
+import heapq
+import atexit
 import pickle
 import logging
 import sqlite3
 import hashlib
+import msgpack
+import functools
+import threading
+
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
 from pathlib import Path
 from typing import Any, Dict, Optional, Union
 from datetime import datetime, timedelta
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 
-from src.config_manager import ConfigManager
+from src.config_manager import ConfigManager, K_CACHE
 
 # 设置日志
 logging.basicConfig(
@@ -20,18 +33,93 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# 序列化格式标记，写在数据首字节用于区分编码方式
+_MSGPACK_TAG = b'\x00'
+_PICKLE_TAG = b'\x01'
+
+# 写缓冲刷新策略：每隔N秒或积累K条待写条目时落盘
+_FLUSH_INTERVAL = 5.0
+_FLUSH_MAX_PENDING = 256
+
+# 访问计数表的容量上限，超出后计数减半衰减
+_SEEN_MAX = 4096
+
+# 文件名哈希只需抗碰撞不需加密强度：优先xxh3，缺失时用BLAKE2b-128
+if xxhash is not None:
+    _hash_hex = xxhash.xxh3_128_hexdigest
+else:
+    def _hash_hex(data: bytes) -> str:
+        return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+@functools.lru_cache(maxsize=1024)
+def _hashed_key(key: str) -> str:
+    """
+    计算缓存键的哈希文件名
+
+    同一个键通常会连续经历get/set，用LRU缓存避免重复哈希
+
+    Args:
+        key: 缓存键
+
+    Returns:
+        哈希后的十六进制字符串
+    """
+    return _hash_hex(key.encode())
+
+def _dumps(value: Any) -> bytes:
+    """
+    序列化缓存值
+
+    优先使用msgpack（对字典/列表/字符串更快、体积更小），
+    无法用msgpack表示的类型回退到pickle
+
+    Args:
+        value: 缓存值
+
+    Returns:
+        序列化后的字节串（首字节为格式标记）
+    """
+    try:
+        return _MSGPACK_TAG + msgpack.packb(value, use_bin_type=True)
+    except (TypeError, ValueError, OverflowError):
+        return _PICKLE_TAG + pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+
+def _loads(data: bytes) -> Any:
+    """
+    反序列化缓存值
+
+    Args:
+        data: 序列化后的字节串
+
+    Returns:
+        缓存值
+    """
+    tag = data[:1]
+    if tag == _MSGPACK_TAG:
+        return msgpack.unpackb(data[1:], raw=False)
+    if tag == _PICKLE_TAG:
+        return pickle.loads(data[1:])
+    # 兼容旧版本写入的纯pickle数据
+    return pickle.loads(data)
+
 class MemoryCache:
     """内存缓存实现"""
     
-    def __init__(self, ttl: int = 3600):
+    def __init__(self, ttl: int = 3600, max_entries: int = 10000):
         """
         初始化内存缓存
-        
+
         Args:
             ttl: 缓存生存时间（秒）
+            max_entries: 最大条目数，超出后按LRU淘汰
         """
-        self.cache: Dict[str, Dict[str, Any]] = {}
+        # OrderedDict按访问顺序维护条目，支持O(1)的LRU淘汰
+        self.cache: 'OrderedDict[str, Dict[str, Any]]' = OrderedDict()
         self.ttl = ttl
+        self.max_entries = max_entries
+
+        # 过期时间最小堆，元素为(expires_at, key)，用于cleanup只扫描已过期的条目
+        self._heap: list = []
     
     def get(self, key: str) -> Optional[Any]:
         """
@@ -47,12 +135,15 @@ class MemoryCache:
             return None
         
         cache_item = self.cache[key]
-        
-        # 检查是否过期
-        if datetime.now() > cache_item['expires_at']:
+
+        # 检查是否过期（expires_at为time.monotonic()的浮点秒数）
+        if time.monotonic() > cache_item['expires_at']:
             del self.cache[key]
             return None
-        
+
+        # 命中后移到队尾，维持LRU顺序
+        self.cache.move_to_end(key)
+
         return cache_item['value']
     
     def set(self, key: str, value: Any, ttl: Optional[int] = None) -> bool:
@@ -69,16 +160,65 @@ class MemoryCache:
         """
         if ttl is None:
             ttl = self.ttl
-        
-        expires_at = datetime.now() + timedelta(seconds=ttl)
+
+        # 使用monotonic浮点时间戳，避免每次操作分配datetime对象
+        expires_at = time.monotonic() + ttl
         
         self.cache[key] = {
             'value': value,
             'expires_at': expires_at
         }
-        
+        self.cache.move_to_end(key)
+
+        heapq.heappush(self._heap, (expires_at, key))
+
+        # cleanup没有固定调用方，堆只靠它排空会无限增长（每次set都压入
+        # 一条记录，覆盖和LRU淘汰都不会摘除堆中旧记录）；堆明显大于
+        # 字典时顺手弹掉已过期的堆头，把堆的体量拉回与存活条目同量级
+        if len(self._heap) > 2 * len(self.cache) + 16:
+            self.cleanup()
+
+        # 超出容量时淘汰最久未访问的条目
+        while len(self.cache) > self.max_entries:
+            self.cache.popitem(last=False)
+
         return True
-    
+
+    def get_many(self, keys: list) -> Dict[str, Any]:
+        """
+        批量获取缓存
+
+        Args:
+            keys: 缓存键列表
+
+        Returns:
+            命中的键值对字典
+        """
+        results = {}
+
+        for key in keys:
+            value = self.get(key)
+            if value is not None:
+                results[key] = value
+
+        return results
+
+    def set_many(self, items: Dict[str, Any], ttl: Optional[int] = None) -> bool:
+        """
+        批量设置缓存
+
+        Args:
+            items: 键值对字典
+            ttl: 缓存生存时间（秒），如果为None则使用默认值
+
+        Returns:
+            是否设置成功
+        """
+        for key, value in items.items():
+            self.set(key, value, ttl)
+
+        return True
+
     def delete(self, key: str) -> bool:
         """
         删除缓存
@@ -103,6 +243,7 @@ class MemoryCache:
             是否清除成功
         """
         self.cache.clear()
+        self._heap.clear()
         return True
     
     def cleanup(self) -> int:
@@ -112,17 +253,20 @@ class MemoryCache:
         Returns:
             清理的缓存数量
         """
-        expired_keys = []
-        now = datetime.now()
-        
-        for key, cache_item in self.cache.items():
-            if now > cache_item['expires_at']:
-                expired_keys.append(key)
-        
-        for key in expired_keys:
-            del self.cache[key]
-        
-        return len(expired_keys)
+        count = 0
+        now = time.monotonic()
+
+        # 堆顶始终是最早过期的条目，弹到第一个未过期的即可停止
+        while self._heap and self._heap[0][0] <= now:
+            expires_at, key = heapq.heappop(self._heap)
+            cache_item = self.cache.get(key)
+
+            # 惰性删除：条目被覆盖后堆中残留的旧记录直接丢弃
+            if cache_item is not None and cache_item['expires_at'] == expires_at:
+                del self.cache[key]
+                count += 1
+
+        return count
 
 
 class FileCache:
@@ -138,9 +282,17 @@ class FileCache:
         """
         self.cache_dir = Path(cache_dir)
         self.ttl = ttl
-        
+
+        # 写缓冲：set先写入内存队列（存(序列化字节串, 过期时间)元组），定期批量落盘
+        self._pending: Dict[str, tuple] = {}
+        self._pending_lock = threading.Lock()
+        self._last_flush = time.monotonic()
+
         # 确保缓存目录存在
         self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+        # 进程退出前把缓冲内容落盘
+        atexit.register(self.flush)
     
     def _get_cache_path(self, key: str) -> Path:
         """
@@ -152,9 +304,8 @@ class FileCache:
         Returns:
             缓存文件路径
         """
-        # 使用MD5哈希作为文件名，避免文件名过长或包含非法字符
-        hashed_key = hashlib.md5(key.encode()).hexdigest()
-        return self.cache_dir / f"{hashed_key}.cache"
+        # 使用哈希作为文件名，避免文件名过长或包含非法字符
+        return self.cache_dir / f"{_hashed_key(key)}.cache"
     
     def get(self, key: str) -> Optional[Any]:
         """
@@ -166,19 +317,42 @@ class FileCache:
         Returns:
             缓存值，如果不存在或已过期则返回None
         """
+        # 先查写缓冲。缓冲条目带各自的过期时间，同样要检查
+        with self._pending_lock:
+            pending_item = self._pending.get(key)
+
+        if pending_item is not None:
+            blob, expires_at = pending_item
+            if time.time() > expires_at:
+                return None
+            return _loads(blob)
+
         cache_path = self._get_cache_path(key)
-        
-        if not cache_path.exists():
+
+        # 单次stat同时完成存在性和过期检查，减少系统调用
+        try:
+            st = os.stat(cache_path)
+        except FileNotFoundError:
             return None
-        
+
         try:
             # 检查文件是否过期
-            modified_time = datetime.fromtimestamp(cache_path.stat().st_mtime)
-            if datetime.now() - modified_time > timedelta(seconds=self.ttl):
+            if time.time() - st.st_mtime > self.ttl:
                 cache_path.unlink(missing_ok=True)
                 return None
-            
-            with open(cache_path, 'rb') as f:
+
+            # 1MiB缓冲减少大对象的read系统调用；pickle直接从文件句柄
+            # 流式反序列化，跳过中间bytes拷贝
+            with open(cache_path, 'rb', buffering=1 << 20) as f:
+                tag = f.read(1)
+
+                if tag == _MSGPACK_TAG:
+                    return msgpack.unpackb(f.read(), raw=False)
+                if tag == _PICKLE_TAG:
+                    return pickle.load(f)
+
+                # 兼容旧版本写入的纯pickle文件
+                f.seek(0)
                 return pickle.load(f)
         except Exception as e:
             logger.error(f"读取文件缓存失败: {e}")
@@ -197,16 +371,101 @@ class FileCache:
         Returns:
             是否设置成功
         """
-        cache_path = self._get_cache_path(key)
-        
-        try:
-            with open(cache_path, 'wb') as f:
-                pickle.dump(value, f)
-            
-            return True
-        except Exception as e:
-            logger.error(f"写入文件缓存失败: {e}")
-            return False
+        return self.set_raw(key, _dumps(value), ttl)
+
+    def set_raw(self, key: str, blob: bytes, ttl: Optional[int] = None) -> bool:
+        """
+        写入已序列化的缓存值
+
+        供上层在多级写入时复用同一份序列化结果，避免重复序列化
+
+        Args:
+            key: 缓存键
+            blob: 序列化后的字节串（含格式标记）
+            ttl: 缓存生存时间（秒），如果为None则使用默认值
+
+        Returns:
+            是否设置成功
+        """
+        if ttl is None:
+            ttl = self.ttl
+
+        with self._pending_lock:
+            self._pending[key] = (blob, time.time() + ttl)
+
+        self._maybe_flush()
+
+        return True
+
+    def set_many(self, items: Dict[str, Any], ttl: Optional[int] = None) -> bool:
+        """
+        批量设置缓存
+
+        Args:
+            items: 键值对字典
+            ttl: 缓存生存时间（秒），如果为None则使用默认值
+
+        Returns:
+            是否设置成功
+        """
+        if ttl is None:
+            ttl = self.ttl
+
+        expires_at = time.time() + ttl
+        blobs = {key: (_dumps(value), expires_at) for key, value in items.items()}
+
+        with self._pending_lock:
+            self._pending.update(blobs)
+
+        self._maybe_flush()
+
+        return True
+
+    def get_many(self, keys: list) -> Dict[str, Any]:
+        """
+        批量获取缓存
+
+        Args:
+            keys: 缓存键列表
+
+        Returns:
+            命中的键值对字典
+        """
+        results = {}
+
+        for key in keys:
+            value = self.get(key)
+            if value is not None:
+                results[key] = value
+
+        return results
+
+    def _maybe_flush(self) -> None:
+        """在缓冲过大或距上次刷新超时后触发落盘"""
+        if (len(self._pending) >= _FLUSH_MAX_PENDING or
+                time.monotonic() - self._last_flush >= _FLUSH_INTERVAL):
+            self.flush()
+
+    def flush(self) -> None:
+        """将写缓冲中的条目落盘"""
+        with self._pending_lock:
+            pending = self._pending
+            self._pending = {}
+            self._last_flush = time.monotonic()
+
+        for key, (blob, expires_at) in pending.items():
+            cache_path = self._get_cache_path(key)
+
+            try:
+                with open(cache_path, 'wb') as f:
+                    f.write(blob)
+
+                # 读路径按"mtime + 全局ttl"判断过期；把mtime回拨到
+                # (expires_at - 全局ttl)，按键TTL就在读路径上自然生效
+                mtime = expires_at - self.ttl
+                os.utime(cache_path, (mtime, mtime))
+            except Exception as e:
+                logger.error(f"写入文件缓存失败: {e}")
     
     def delete(self, key: str) -> bool:
         """
@@ -218,17 +477,20 @@ class FileCache:
         Returns:
             是否删除成功
         """
+        with self._pending_lock:
+            dropped = self._pending.pop(key, None) is not None
+
         cache_path = self._get_cache_path(key)
-        
-        if cache_path.exists():
-            try:
-                cache_path.unlink()
-                return True
-            except Exception as e:
-                logger.error(f"删除文件缓存失败: {e}")
-                return False
-        
-        return False
+
+        # 直接尝试删除，省去一次存在性stat
+        try:
+            cache_path.unlink()
+            return True
+        except FileNotFoundError:
+            return dropped
+        except Exception as e:
+            logger.error(f"删除文件缓存失败: {e}")
+            return False
     
     def clear(self) -> bool:
         """
@@ -237,10 +499,15 @@ class FileCache:
         Returns:
             是否清除成功
         """
+        with self._pending_lock:
+            self._pending.clear()
+
         try:
-            for cache_file in self.cache_dir.glob('*.cache'):
-                cache_file.unlink()
-            
+            with os.scandir(self.cache_dir) as it:
+                for entry in it:
+                    if entry.name.endswith('.cache'):
+                        os.unlink(entry.path)
+
             return True
         except Exception as e:
             logger.error(f"清除文件缓存失败: {e}")
@@ -254,21 +521,33 @@ class FileCache:
             清理的缓存数量
         """
         count = 0
-        now = datetime.now()
-        
+        now = time.time()
+
         try:
-            for cache_file in self.cache_dir.glob('*.cache'):
-                modified_time = datetime.fromtimestamp(cache_file.stat().st_mtime)
-                if now - modified_time > timedelta(seconds=self.ttl):
-                    cache_file.unlink()
-                    count += 1
-            
+            # DirEntry.stat()复用readdir返回的元数据，不额外产生stat系统调用
+            with os.scandir(self.cache_dir) as it:
+                for entry in it:
+                    if not entry.name.endswith('.cache'):
+                        continue
+
+                    if now - entry.stat().st_mtime > self.ttl:
+                        os.unlink(entry.path)
+                        count += 1
+
             return count
         except Exception as e:
             logger.error(f"清理过期文件缓存失败: {e}")
             return count
 
 
+# SQL常量：语句文本保持完全一致，SQLite才能命中连接内部的编译语句缓存
+_SQL_GET = 'SELECT value, expires_at FROM cache WHERE key = ?'
+_SQL_UPSERT = 'INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)'
+_SQL_DELETE = 'DELETE FROM cache WHERE key = ?'
+_SQL_CLEAR = 'DELETE FROM cache'
+_SQL_PURGE = 'DELETE FROM cache WHERE expires_at < ?'
+
+
 class DatabaseCache:
     """数据库缓存实现"""
     
@@ -282,30 +561,91 @@ class DatabaseCache:
         """
         self.db_path = Path(db_path)
         self.ttl = ttl
-        
+
+        # 每个线程持有一个长连接，避免每次操作重新建连
+        self._tls = threading.local()
+
+        # 写缓冲：set先写入内存队列（存(blob, expires_at)元组），定期单事务批量写库
+        self._pending: Dict[str, tuple] = {}
+        self._pending_lock = threading.Lock()
+        self._last_flush = time.monotonic()
+
         # 确保数据库目录存在
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
-        
+
         # 初始化数据库
         self._init_database()
-    
+
+        # 进程退出前把缓冲内容写库
+        atexit.register(self.flush)
+
+    def _conn(self) -> sqlite3.Connection:
+        """
+        获取当前线程的数据库连接
+
+        Returns:
+            当前线程的长连接，首次调用时创建并应用PRAGMA调优
+        """
+        conn = getattr(self._tls, 'conn', None)
+
+        if conn is None:
+            conn = sqlite3.connect(
+                self.db_path,
+                check_same_thread=False,
+                cached_statements=256
+            )
+            conn.executescript(
+                'PRAGMA journal_mode=WAL;'
+                'PRAGMA synchronous=NORMAL;'
+                'PRAGMA temp_store=MEMORY;'
+                # mmap让读路径直接命中OS页缓存，省去用户态缓冲区拷贝
+                'PRAGMA mmap_size=268435456;'
+                # 页缓存64MB（负值单位为KB）
+                'PRAGMA cache_size=-65536;'
+            )
+            self._tls.conn = conn
+
+        return conn
+
     def _init_database(self) -> None:
         """初始化数据库"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._conn()
             cursor = conn.cursor()
-            
+
+            # 旧版本的表用created_at文本时间戳，迁移为expires_at数值列
+            cursor.execute('PRAGMA table_info(cache)')
+            columns = [row[1] for row in cursor.fetchall()]
+
+            if columns and 'expires_at' not in columns:
+                conn.executescript(f'''
+                ALTER TABLE cache RENAME TO cache_old;
+                CREATE TABLE cache (
+                    key TEXT PRIMARY KEY,
+                    value BLOB NOT NULL,
+                    expires_at REAL NOT NULL
+                );
+                INSERT INTO cache
+                SELECT key, value, strftime('%s', created_at) + {float(self.ttl)}
+                FROM cache_old;
+                DROP TABLE cache_old;
+                ''')
+
             # 创建缓存表
             cursor.execute('''
             CREATE TABLE IF NOT EXISTS cache (
                 key TEXT PRIMARY KEY,
                 value BLOB NOT NULL,
-                created_at TEXT NOT NULL
+                expires_at REAL NOT NULL
             )
             ''')
-            
+
+            # expires_at上的索引让cleanup变成O(log n)的范围删除
+            cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_cache_expires_at ON cache(expires_at)
+            ''')
+
             conn.commit()
-            conn.close()
         except Exception as e:
             logger.error(f"初始化数据库缓存失败: {e}")
             raise
@@ -320,30 +660,34 @@ class DatabaseCache:
         Returns:
             缓存值，如果不存在或已过期则返回None
         """
+        # 先查写缓冲。缓冲条目同样要做过期检查：flush只由后续写触发，
+        # 静默期内过期条目会一直留在缓冲里
+        with self._pending_lock:
+            pending_item = self._pending.get(key)
+
+        if pending_item is not None:
+            blob, expires_at = pending_item
+            if time.time() > expires_at:
+                return None
+            return _loads(blob)
+
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute(
-                'SELECT value, created_at FROM cache WHERE key = ?',
-                (key,)
-            )
+            cursor = self._conn().cursor()
+
+            cursor.execute(_SQL_GET, (key,))
             result = cursor.fetchone()
-            
-            conn.close()
-            
+
             if not result:
                 return None
-            
-            value_blob, created_at_str = result
-            created_at = datetime.fromisoformat(created_at_str)
-            
+
+            value_blob, expires_at = result
+
             # 检查是否过期
-            if datetime.now() - created_at > timedelta(seconds=self.ttl):
+            if time.time() > expires_at:
                 self.delete(key)
                 return None
-            
-            return pickle.loads(value_blob)
+
+            return _loads(value_blob)
         except Exception as e:
             logger.error(f"获取数据库缓存失败: {e}")
             return None
@@ -360,25 +704,141 @@ class DatabaseCache:
         Returns:
             是否设置成功
         """
+        return self.set_raw(key, _dumps(value), ttl)
+
+    def set_raw(self, key: str, blob: bytes, ttl: Optional[int] = None) -> bool:
+        """
+        写入已序列化的缓存值
+
+        供上层在多级写入时复用同一份序列化结果，避免重复序列化
+
+        Args:
+            key: 缓存键
+            blob: 序列化后的字节串（含格式标记）
+            ttl: 缓存生存时间（秒），如果为None则使用默认值
+
+        Returns:
+            是否设置成功
+        """
+        if ttl is None:
+            ttl = self.ttl
+
+        with self._pending_lock:
+            self._pending[key] = (blob, time.time() + ttl)
+
+        self._maybe_flush()
+
+        return True
+
+    def get_many(self, keys: list) -> Dict[str, Any]:
+        """
+        批量获取缓存，所有键在一条SELECT内查询
+
+        Args:
+            keys: 缓存键列表
+
+        Returns:
+            命中的键值对字典
+        """
+        results = {}
+
+        # 先查写缓冲（带过期检查）。缓冲里已过期的键是确定的未命中，
+        # 不再下探查库，否则会捞回更旧的落库值
+        now = time.time()
+        expired_pending = set()
+
+        with self._pending_lock:
+            for key in keys:
+                pending_item = self._pending.get(key)
+                if pending_item is None:
+                    continue
+                if now > pending_item[1]:
+                    expired_pending.add(key)
+                else:
+                    results[key] = _loads(pending_item[0])
+
+        missing = [key for key in keys
+                   if key not in results and key not in expired_pending]
+        if not missing:
+            return results
+
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            now = datetime.now().isoformat()
-            value_blob = pickle.dumps(value)
-            
+            now = time.time()
+            placeholders = ','.join('?' * len(missing))
+
+            cursor = self._conn().cursor()
             cursor.execute(
-                'INSERT OR REPLACE INTO cache (key, value, created_at) VALUES (?, ?, ?)',
-                (key, value_blob, now)
+                f'SELECT key, value, expires_at FROM cache WHERE key IN ({placeholders})',
+                missing
             )
-            
-            conn.commit()
-            conn.close()
-            
+
+            for key, value_blob, expires_at in cursor.fetchall():
+                if now <= expires_at:
+                    results[key] = _loads(value_blob)
+        except Exception as e:
+            logger.error(f"批量获取数据库缓存失败: {e}")
+
+        return results
+
+    def set_many(self, items: Dict[str, Any], ttl: Optional[int] = None) -> bool:
+        """
+        批量设置缓存，所有行在单个事务内写入
+
+        Args:
+            items: 键值对字典
+            ttl: 缓存生存时间（秒），如果为None则使用默认值
+
+        Returns:
+            是否设置成功
+        """
+        if ttl is None:
+            ttl = self.ttl
+
+        # 丢弃写缓冲中的旧值，以本次批量写入为准
+        with self._pending_lock:
+            for key in items:
+                self._pending.pop(key, None)
+
+        try:
+            expires_at = time.time() + ttl
+            rows = [(key, _dumps(value), expires_at) for key, value in items.items()]
+
+            conn = self._conn()
+            with conn:
+                conn.executemany(_SQL_UPSERT, rows)
+
             return True
         except Exception as e:
-            logger.error(f"设置数据库缓存失败: {e}")
+            logger.error(f"批量设置数据库缓存失败: {e}")
             return False
+
+    def _maybe_flush(self) -> None:
+        """在缓冲过大或距上次刷新超时后触发写库"""
+        if (len(self._pending) >= _FLUSH_MAX_PENDING or
+                time.monotonic() - self._last_flush >= _FLUSH_INTERVAL):
+            self.flush()
+
+    def flush(self) -> None:
+        """将写缓冲中的条目在单个事务内批量写库"""
+        with self._pending_lock:
+            pending = self._pending
+            self._pending = {}
+            self._last_flush = time.monotonic()
+
+        if not pending:
+            return
+
+        try:
+            rows = [
+                (key, blob, expires_at)
+                for key, (blob, expires_at) in pending.items()
+            ]
+
+            conn = self._conn()
+            with conn:
+                conn.executemany(_SQL_UPSERT, rows)
+        except Exception as e:
+            logger.error(f"设置数据库缓存失败: {e}")
     
     def delete(self, key: str) -> bool:
         """
@@ -390,18 +850,16 @@ class DatabaseCache:
         Returns:
             是否删除成功
         """
+        with self._pending_lock:
+            self._pending.pop(key, None)
+
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute(
-                'DELETE FROM cache WHERE key = ?',
-                (key,)
-            )
-            
+            conn = self._conn()
+
+            conn.execute(_SQL_DELETE, (key,))
+
             conn.commit()
-            conn.close()
-            
+
             return True
         except Exception as e:
             logger.error(f"删除数据库缓存失败: {e}")
@@ -414,15 +872,16 @@ class DatabaseCache:
         Returns:
             是否清除成功
         """
+        with self._pending_lock:
+            self._pending.clear()
+
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('DELETE FROM cache')
-            
+            conn = self._conn()
+
+            conn.execute(_SQL_CLEAR)
+
             conn.commit()
-            conn.close()
-            
+
             return True
         except Exception as e:
             logger.error(f"清除数据库缓存失败: {e}")
@@ -436,21 +895,14 @@ class DatabaseCache:
             清理的缓存数量
         """
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cutoff_date = (datetime.now() - timedelta(seconds=self.ttl)).isoformat()
-            
-            cursor.execute(
-                'DELETE FROM cache WHERE created_at < ?',
-                (cutoff_date,)
-            )
-            
+            conn = self._conn()
+
+            cursor = conn.execute(_SQL_PURGE, (time.time(),))
+
             deleted_count = cursor.rowcount
-            
+
             conn.commit()
-            conn.close()
-            
+
             return deleted_count
         except Exception as e:
             logger.error(f"清理过期数据库缓存失败: {e}")
@@ -468,19 +920,19 @@ class CacheManager:
             config_manager: 配置管理器实例
         """
         self.config_manager = config_manager
-        self.data_dir = Path(config_manager.get_config('global.data_dir', './data'))
+        self.data_dir = Path(config_manager.data_dir)
         
         # 获取缓存配置
-        cache_config = config_manager.get_config('global.cache', {})
+        cache_config = config_manager.get_config_tuple(K_CACHE, {})
         
         # 初始化各级缓存
         self.memory_enabled = cache_config.get('memory_enabled', True)
         self.file_enabled = cache_config.get('file_enabled', True)
         self.db_enabled = cache_config.get('db_enabled', True)
         
-        self.memory_ttl = cache_config.get('memory_ttl', 3600)
-        self.file_ttl = cache_config.get('file_ttl', 86400)
-        self.db_ttl = cache_config.get('db_ttl', 604800)
+        self.memory_ttl = config_manager.memory_ttl
+        self.file_ttl = config_manager.file_ttl
+        self.db_ttl = config_manager.db_ttl
         
         # 创建缓存实例
         if self.memory_enabled:
@@ -499,7 +951,20 @@ class CacheManager:
             self.db_cache = DatabaseCache(db_path=db_path, ttl=self.db_ttl)
         else:
             self.db_cache = None
-        
+
+        # 启用的缓存层级按查找顺序绑定成元组，get热路径无需重复判空
+        self._layers = tuple(
+            layer for layer in (self.memory_cache, self.file_cache, self.db_cache)
+            if layer is not None
+        )
+
+        # 回填专用的单线程池：慢层级命中后异步提升，调用方不等待磁盘写入
+        self._promote_pool = ThreadPoolExecutor(max_workers=1)
+        atexit.register(self._promote_pool.shutdown)
+
+        # 访问计数，用于抗扫描的准入策略：第二次命中才回填到快层级
+        self._seen: Counter = Counter()
+
         logger.info("缓存管理器初始化完成")
     
     def get(self, key: str, cache_type: Optional[str] = None) -> Optional[Any]:
@@ -521,36 +986,56 @@ class CacheManager:
         elif cache_type == 'db':
             return self.db_cache.get(key) if self.db_cache else None
         
-        # 按顺序查找各级缓存
-        value = None
-        
-        # 先查找内存缓存
-        if self.memory_cache:
-            value = self.memory_cache.get(key)
-            if value is not None:
-                return value
-        
-        # 再查找文件缓存
-        if self.file_cache:
-            value = self.file_cache.get(key)
+        # 按顺序查找各级缓存，命中后异步回填到更快的层级
+        for i, layer in enumerate(self._layers):
+            value = layer.get(key)
             if value is not None:
-                # 如果在文件缓存中找到，则更新内存缓存
-                if self.memory_cache:
-                    self.memory_cache.set(key, value)
+                if i > 0 and self._record_access(key):
+                    self._promote_pool.submit(
+                        self._promote, self._layers[:i], key, value
+                    )
                 return value
-        
-        # 最后查找数据库缓存
-        if self.db_cache:
-            value = self.db_cache.get(key)
-            if value is not None:
-                # 如果在数据库缓存中找到，则更新内存缓存和文件缓存
-                if self.memory_cache:
-                    self.memory_cache.set(key, value)
-                if self.file_cache:
-                    self.file_cache.set(key, value)
-                return value
-        
+
         return None
+
+    def _record_access(self, key: str) -> bool:
+        """
+        记录慢层级命中并判断是否应回填
+
+        一次性扫描（如定时任务批量读取）只访问每个键一次，
+        推迟到第二次命中才回填可以避免这类访问冲刷快层级
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            是否应该回填到更快的层级
+        """
+        self._seen[key] += 1
+
+        # 超出容量时计数减半，近期热点保留、陈旧记录淘汰
+        if len(self._seen) > _SEEN_MAX:
+            self._seen = Counter({
+                k: c >> 1 for k, c in self._seen.items() if c > 1
+            })
+
+        return self._seen[key] >= 2
+
+    @staticmethod
+    def _promote(layers: tuple, key: str, value: Any) -> None:
+        """
+        将命中的值回填到更快的缓存层级
+
+        Args:
+            layers: 需要回填的层级
+            key: 缓存键
+            value: 缓存值
+        """
+        for layer in layers:
+            try:
+                layer.set(key, value)
+            except Exception as e:
+                logger.error(f"缓存回填失败: {e}")
     
     def set(self, key: str, value: Any, ttl: Optional[int] = None, 
             cache_type: Optional[str] = None) -> bool:
@@ -576,21 +1061,92 @@ class CacheManager:
         
         # 设置所有启用的缓存
         success = True
-        
+
         if self.memory_cache:
             memory_success = self.memory_cache.set(key, value, ttl)
             success = success and memory_success
-        
+
+        # 文件和数据库层共享同一份序列化结果，只序列化一次
+        if self.file_cache or self.db_cache:
+            blob = _dumps(value)
+
+            if self.file_cache:
+                file_success = self.file_cache.set_raw(key, blob, ttl)
+                success = success and file_success
+
+            if self.db_cache:
+                db_success = self.db_cache.set_raw(key, blob, ttl)
+                success = success and db_success
+
+        return success
+
+    def get_many(self, keys: list, cache_type: Optional[str] = None) -> Dict[str, Any]:
+        """
+        批量获取缓存，每级缓存只查询一次
+
+        Args:
+            keys: 缓存键列表
+            cache_type: 缓存类型，可选值为'memory'、'file'、'db'，如果为None则按顺序查找
+
+        Returns:
+            命中的键值对字典
+        """
+        # 如果指定了缓存类型，则只查找指定类型的缓存
+        if cache_type == 'memory':
+            return self.memory_cache.get_many(keys) if self.memory_cache else {}
+        elif cache_type == 'file':
+            return self.file_cache.get_many(keys) if self.file_cache else {}
+        elif cache_type == 'db':
+            return self.db_cache.get_many(keys) if self.db_cache else {}
+
+        # 逐层批量查找，命中的键不再下探
+        results: Dict[str, Any] = {}
+        missing = list(keys)
+
+        for layer in self._layers:
+            if not missing:
+                break
+
+            results.update(layer.get_many(missing))
+            missing = [key for key in missing if key not in results]
+
+        return results
+
+    def set_many(self, items: Dict[str, Any], ttl: Optional[int] = None,
+                 cache_type: Optional[str] = None) -> bool:
+        """
+        批量设置缓存，走各级缓存的批量接口
+
+        Args:
+            items: 键值对字典
+            ttl: 缓存生存时间（秒），如果为None则使用默认值
+            cache_type: 缓存类型，可选值为'memory'、'file'、'db'，如果为None则设置所有启用的缓存
+
+        Returns:
+            是否设置成功
+        """
+        # 如果指定了缓存类型，则只设置指定类型的缓存
+        if cache_type == 'memory':
+            return self.memory_cache.set_many(items, ttl) if self.memory_cache else False
+        elif cache_type == 'file':
+            return self.file_cache.set_many(items, ttl) if self.file_cache else False
+        elif cache_type == 'db':
+            return self.db_cache.set_many(items, ttl) if self.db_cache else False
+
+        # 设置所有启用的缓存
+        success = True
+
+        if self.memory_cache:
+            success = self.memory_cache.set_many(items, ttl) and success
+
         if self.file_cache:
-            file_success = self.file_cache.set(key, value, ttl)
-            success = success and file_success
-        
+            success = self.file_cache.set_many(items, ttl) and success
+
         if self.db_cache:
-            db_success = self.db_cache.set(key, value, ttl)
-            success = success and db_success
-        
+            success = self.db_cache.set_many(items, ttl) and success
+
         return success
-    
+
     def delete(self, key: str, cache_type: Optional[str] = None) -> bool:
         """
         删除缓存
@@ -2,8 +2,11 @@
 配置管理模块，负责加载和管理所有配置项
 """
 import os
+import copy
 import yaml
+import orjson
 import logging
+import functools
 from pathlib import Path
 from typing import Any, Dict, Optional, List
 
@@ -14,6 +17,103 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# 优先使用libyaml的C解析器，不可用时回退到纯Python实现
+_YAML_LOADER = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+# 预编译的热点配置路径，内部调用走元组形式省去每次split
+K_DATA_DIR = ('global', 'data_dir')
+K_CACHE = ('global', 'cache')
+K_RETENTION_DAYS = ('global', 'data_retention_days')
+K_LLM = ('llm',)
+K_WEB_HOST = ('web', 'host')
+K_WEB_PORT = ('web', 'port')
+
+# 默认配置模板，所有实例共享，合并时对容器做拷贝避免互相污染
+DEFAULTS: Dict[str, Any] = {
+    'global': {
+        'data_dir': './data',
+        'data_retention_days': 90,
+        'cache': {
+            'memory_enabled': True,
+            'file_enabled': True,
+            'db_enabled': True,
+            'memory_ttl': 3600,  # 1小时
+            'file_ttl': 86400,   # 1天
+            'db_ttl': 604800     # 7天
+        }
+    },
+    'llm': {
+        'default_provider': 'openai',
+        'openai': {
+            'api_key': os.environ.get('OPENAI_API_KEY', ''),
+            'base_url': 'https://api.openai.com/v1',
+            'model': 'gpt-3.5-turbo'
+        },
+        'gemini': {
+            'api_key': os.environ.get('GEMINI_API_KEY', ''),
+            'base_url': 'https://generativelanguage.googleapis.com/v1',
+            'model': 'gemini-pro'
+        },
+        'claude': {
+            'api_key': os.environ.get('CLAUDE_API_KEY', ''),
+            'base_url': 'https://api.anthropic.com/v1',
+            'model': 'claude-2'
+        },
+        'ollama': {
+            'base_url': 'http://localhost:11434/api',
+            'model': 'llama2'
+        },
+        'deepseek': {
+            'api_key': os.environ.get('DEEPSEEK_API_KEY', ''),
+            'base_url': 'https://api.deepseek.com/v1',
+            'model': 'deepseek-chat'
+        },
+        'azure': {
+            'api_key': os.environ.get('AZURE_API_KEY', ''),
+            'base_url': os.environ.get('AZURE_ENDPOINT', ''),
+            'deployment_id': os.environ.get('AZURE_DEPLOYMENT_ID', ''),
+            'api_version': '2023-05-15'
+        }
+    },
+    'web': {
+        'host': '0.0.0.0',
+        'port': 8000
+    }
+}
+
+# 单个RSS组的默认配置
+GROUP_DEFAULTS: Dict[str, Any] = {
+    'urls': [],
+    'interval': 60,
+    'deduplication': {
+        'enabled': True,
+        'days': 3
+    },
+    'filter': {
+        'enabled': False,
+        'prompt': ''
+    },
+    'summary': {
+        'enabled': False,
+        'max_length': 150
+    }
+}
+
+def _deep_merge(dst: Dict[str, Any], src: Dict[str, Any]) -> None:
+    """
+    将默认值递归合并进目标字典，只补充缺失的键
+
+    Args:
+        dst: 目标字典（被补充）
+        src: 默认值字典
+    """
+    for key, value in src.items():
+        if isinstance(value, dict) and isinstance(dst.get(key), dict):
+            _deep_merge(dst[key], value)
+        elif key not in dst:
+            # 拷贝默认值，防止多个配置共享同一个可变对象
+            dst[key] = copy.deepcopy(value)
+
 class ConfigManager:
     """配置管理类，负责加载和管理所有配置项"""
     
@@ -35,7 +135,16 @@ class ConfigManager:
         
         # 验证配置
         self._validate_config()
-        
+
+        # 绑定热点配置为实例属性
+        self._bind_hot_attrs()
+
+        # 点号键解析缓存，绑定到实例避免跨实例共享
+        self._resolve = functools.lru_cache(maxsize=256)(self._resolve_key)
+
+        # 配置版本号，每次保存（即配置变更落盘）时递增，供下游做版本戳缓存
+        self._version = 0
+
         logger.info("配置管理器初始化完成")
     
     def _load_config(self) -> None:
@@ -49,168 +158,89 @@ class ConfigManager:
         # 如果配置文件存在，则加载
         if config_path.exists():
             try:
+                yaml_mtime = config_path.stat().st_mtime
+
+                # 优先从JSON快照加载（orjson解析远快于YAML解析）
+                snapshot = self._load_snapshot(yaml_mtime)
+                if snapshot is not None:
+                    self.config = snapshot
+                    logger.info(f"从 {self.config_path} 的JSON快照加载配置成功")
+                    return
+
                 with open(config_path, 'r', encoding='utf-8') as f:
-                    self.config = yaml.safe_load(f)
+                    self.config = yaml.load(f, Loader=_YAML_LOADER)
                 logger.info(f"从 {self.config_path} 加载配置成功")
+
+                # 写入快照，下次启动可跳过YAML解析
+                self._save_snapshot(yaml_mtime)
             except Exception as e:
                 logger.error(f"加载配置文件失败: {e}")
                 self.config = {}
         else:
             logger.warning(f"配置文件 {self.config_path} 不存在，将使用默认配置")
             self.config = {}
+
+    def _snapshot_path(self) -> Path:
+        """获取JSON快照文件路径"""
+        return Path(f"{self.config_path}.json")
+
+    def _load_snapshot(self, yaml_mtime: float) -> Optional[Dict[str, Any]]:
+        """
+        从JSON快照加载配置
+
+        Args:
+            yaml_mtime: YAML配置文件的修改时间
+
+        Returns:
+            配置字典，如果快照不存在或已过时则返回None
+        """
+        snapshot_path = self._snapshot_path()
+
+        if not snapshot_path.exists():
+            return None
+
+        try:
+            snapshot = orjson.loads(snapshot_path.read_bytes())
+
+            # 快照中记录的YAML修改时间不一致时视为过时
+            if snapshot.get('yaml_mtime') != yaml_mtime:
+                return None
+
+            return snapshot.get('config')
+        except Exception as e:
+            logger.warning(f"加载配置快照失败: {e}")
+            return None
+
+    def _save_snapshot(self, yaml_mtime: float) -> None:
+        """
+        保存配置的JSON快照
+
+        Args:
+            yaml_mtime: YAML配置文件的修改时间
+        """
+        try:
+            snapshot = {
+                'yaml_mtime': yaml_mtime,
+                'config': self.config
+            }
+            self._snapshot_path().write_bytes(orjson.dumps(snapshot))
+        except Exception as e:
+            logger.warning(f"保存配置快照失败: {e}")
     
     def _set_defaults(self) -> None:
         """设置默认配置值"""
-        # 全局默认配置
-        if 'global' not in self.config:
-            self.config['global'] = {}
-        
-        global_defaults = {
-            'data_dir': './data',
-            'data_retention_days': 90,
-            'cache': {
-                'memory_enabled': True,
-                'file_enabled': True,
-                'db_enabled': True,
-                'memory_ttl': 3600,  # 1小时
-                'file_ttl': 86400,   # 1天
-                'db_ttl': 604800     # 7天
-            }
-        }
-        
-        # 更新全局配置默认值
-        for key, value in global_defaults.items():
-            if key not in self.config['global']:
-                self.config['global'][key] = value
-            elif isinstance(value, dict) and isinstance(self.config['global'][key], dict):
-                # 对于嵌套字典，递归更新默认值
-                for sub_key, sub_value in value.items():
-                    if sub_key not in self.config['global'][key]:
-                        self.config['global'][key][sub_key] = sub_value
-        
-        # LLM默认配置
-        if 'llm' not in self.config:
-            self.config['llm'] = {}
-        
-        llm_defaults = {
-            'default_provider': 'openai',
-            'openai': {
-                'api_key': os.environ.get('OPENAI_API_KEY', ''),
-                'base_url': 'https://api.openai.com/v1',
-                'model': 'gpt-3.5-turbo'
-            },
-            'gemini': {
-                'api_key': os.environ.get('GEMINI_API_KEY', ''),
-                'base_url': 'https://generativelanguage.googleapis.com/v1',
-                'model': 'gemini-pro'
-            },
-            'claude': {
-                'api_key': os.environ.get('CLAUDE_API_KEY', ''),
-                'base_url': 'https://api.anthropic.com/v1',
-                'model': 'claude-2'
-            },
-            'ollama': {
-                'base_url': 'http://localhost:11434/api',
-                'model': 'llama2'
-            },
-            'deepseek': {
-                'api_key': os.environ.get('DEEPSEEK_API_KEY', ''),
-                'base_url': 'https://api.deepseek.com/v1',
-                'model': 'deepseek-chat'
-            },
-            'azure': {
-                'api_key': os.environ.get('AZURE_API_KEY', ''),
-                'base_url': os.environ.get('AZURE_ENDPOINT', ''),
-                'deployment_id': os.environ.get('AZURE_DEPLOYMENT_ID', ''),
-                'api_version': '2023-05-15'
-            }
-        }
-        
-        # 更新LLM配置默认值
-        for key, value in llm_defaults.items():
-            if key not in self.config['llm']:
-                self.config['llm'][key] = value
-            elif isinstance(value, dict) and isinstance(self.config['llm'][key], dict):
-                # 对于嵌套字典，递归更新默认值
-                for sub_key, sub_value in value.items():
-                    if sub_key not in self.config['llm'][key]:
-                        self.config['llm'][key][sub_key] = sub_value
-        
-        # Web服务默认配置
-        if 'web' not in self.config:
-            self.config['web'] = {}
-        
-        web_defaults = {
-            'host': '0.0.0.0',
-            'port': 8000
-        }
-        
-        # 更新Web服务配置默认值
-        for key, value in web_defaults.items():
-            if key not in self.config['web']:
-                self.config['web'][key] = value
-        
+        # 全局/LLM/Web默认值一次性深度合并
+        _deep_merge(self.config, DEFAULTS)
+
         # RSS组默认配置
         if 'groups' not in self.config:
             self.config['groups'] = {
-                'default': {
-                    'urls': [],
-                    'interval': 60,
-                    'deduplication': {
-                        'enabled': True,
-                        'days': 3
-                    },
-                    'filter': {
-                        'enabled': False,
-                        'prompt': ''
-                    },
-                    'summary': {
-                        'enabled': False,
-                        'max_length': 150
-                    }
-                }
+                'default': copy.deepcopy(GROUP_DEFAULTS)
             }
         else:
-            # 为每个组设置默认值
-            for group_name, group_config in self.config['groups'].items():
-                if 'urls' not in group_config:
-                    group_config['urls'] = []
-                
-                if 'interval' not in group_config:
-                    group_config['interval'] = 60
-                
-                if 'deduplication' not in group_config:
-                    group_config['deduplication'] = {
-                        'enabled': True,
-                        'days': 3
-                    }
-                elif isinstance(group_config['deduplication'], dict):
-                    if 'enabled' not in group_config['deduplication']:
-                        group_config['deduplication']['enabled'] = True
-                    if 'days' not in group_config['deduplication']:
-                        group_config['deduplication']['days'] = 3
-                
-                if 'filter' not in group_config:
-                    group_config['filter'] = {
-                        'enabled': False,
-                        'prompt': ''
-                    }
-                elif isinstance(group_config['filter'], dict):
-                    if 'enabled' not in group_config['filter']:
-                        group_config['filter']['enabled'] = False
-                    if 'prompt' not in group_config['filter']:
-                        group_config['filter']['prompt'] = ''
-                
-                if 'summary' not in group_config:
-                    group_config['summary'] = {
-                        'enabled': False,
-                        'max_length': 150
-                    }
-                elif isinstance(group_config['summary'], dict):
-                    if 'enabled' not in group_config['summary']:
-                        group_config['summary']['enabled'] = False
-                    if 'max_length' not in group_config['summary']:
-                        group_config['summary']['max_length'] = 150
+            # 为每个组补充默认值
+            for group_config in self.config['groups'].values():
+                _deep_merge(group_config, GROUP_DEFAULTS)
     
     def _validate_config(self) -> None:
         """验证配置是否有效"""
@@ -233,28 +263,91 @@ class ConfigManager:
                 logger.warning(f"RSS组 {group_name} 的更新间隔必须是正整数，设置为默认值 60")
                 group_config['interval'] = 60
     
+    def _bind_hot_attrs(self) -> None:
+        """
+        把高频读取的配置项绑定为实例属性
+
+        默认值合并和验证之后这些键一定存在，下游直接用属性访问
+        （单次LOAD_ATTR）代替每次的键拆分和字典遍历。
+        这些属性在初始化后视为稳定值，配置修改后不会自动更新。
+        """
+        global_config = self.config['global']
+        cache_config = global_config['cache']
+        web_config = self.config['web']
+
+        self.data_dir = global_config['data_dir']
+        self.data_retention_days = global_config['data_retention_days']
+        self.memory_ttl = cache_config['memory_ttl']
+        self.file_ttl = cache_config['file_ttl']
+        self.db_ttl = cache_config['db_ttl']
+        self.web_host = web_config['host']
+        self.web_port = web_config['port']
+
+    def _resolve_key(self, key: str) -> Any:
+        """
+        解析点号分隔的配置键
+
+        Args:
+            key: 配置项键名
+
+        Returns:
+            配置项的值
+
+        Raises:
+            KeyError: 配置项不存在
+        """
+        value = self.config
+
+        for k in key.split('.'):
+            if isinstance(value, dict) and k in value:
+                value = value[k]
+            else:
+                raise KeyError(key)
+
+        return value
+
     def get_config(self, key: str, default: Any = None) -> Any:
         """
         获取配置项
-        
+
         Args:
             key: 配置项键名，支持点号分隔的嵌套键
             default: 默认值，如果配置项不存在则返回此值
-        
+
+        Returns:
+            配置项的值
+        """
+        try:
+            return self._resolve(key)
+        except KeyError:
+            return default
+
+    def get_config_tuple(self, path: tuple, default: Any = None) -> Any:
+        """
+        获取配置项（预编译的元组键形式）
+
+        Args:
+            path: 配置项路径元组，如('global', 'data_dir')
+            default: 默认值，如果配置项不存在则返回此值
+
         Returns:
             配置项的值
         """
-        keys = key.split('.')
         value = self.config
-        
-        for k in keys:
+
+        for k in path:
             if isinstance(value, dict) and k in value:
                 value = value[k]
             else:
                 return default
-        
+
         return value
-    
+
+    @property
+    def version(self) -> int:
+        """当前配置版本号，配置保存后递增"""
+        return self._version
+
     def get_group_config(self, group_name: str) -> Dict[str, Any]:
         """
         获取特定RSS组的配置
@@ -286,13 +379,20 @@ class ConfigManager:
         """
         try:
             config_path = Path(self.config_path)
-            
+
+            # 配置可能已被修改，使解析缓存失效并递增版本号
+            self._resolve.cache_clear()
+            self._version += 1
+
             # 确保目录存在
             config_path.parent.mkdir(parents=True, exist_ok=True)
             
             with open(config_path, 'w', encoding='utf-8') as f:
                 yaml.dump(self.config, f, default_flow_style=False, allow_unicode=True)
-            
+
+            # 同步更新JSON快照，避免下次启动重新解析YAML
+            self._save_snapshot(config_path.stat().st_mtime)
+
             logger.info(f"配置已保存到 {self.config_path}")
             return True
         except Exception as e:
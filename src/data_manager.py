@@ -2,12 +2,16 @@
 数据存储模块，负责管理数据的持久化存储
 """
 import os
+import atexit
 import sqlite3
 import logging
-import json
+import orjson
+import time
+import threading
+from contextlib import contextmanager
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple, Union
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
 
 from src.config_manager import ConfigManager
 
@@ -18,6 +22,37 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# SQL常量：语句文本保持完全一致，SQLite才能命中连接内部的编译语句缓存
+# LIMIT统一参数化，-1表示不限制
+_SQL_UPSERT_ENTRY = '''
+INSERT INTO entries
+(entry_id, group_name, title, link, published, content, summary,
+ filtered, created_at, updated_at)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(entry_id, group_name) DO UPDATE SET
+    title = excluded.title,
+    link = excluded.link,
+    published = excluded.published,
+    content = excluded.content,
+    summary = excluded.summary,
+    filtered = excluded.filtered,
+    updated_at = excluded.updated_at
+'''
+_SQL_GET_ENTRIES = ('SELECT * FROM entries WHERE group_name = ? '
+                    'ORDER BY published DESC LIMIT ?')
+_SQL_GET_ENTRIES_FILTERED = ('SELECT * FROM entries WHERE group_name = ? AND filtered = 1 '
+                             'ORDER BY published DESC LIMIT ?')
+_SQL_GET_ENTRY_BY_ID = 'SELECT * FROM entries WHERE entry_id = ? AND group_name = ?'
+_SQL_DELETE_OLD_CHUNK = ('DELETE FROM entries WHERE rowid IN ('
+                         'SELECT rowid FROM entries WHERE created_at < ? LIMIT 10000)')
+_SQL_UPSERT_METADATA = (
+    'INSERT INTO metadata (group_name, last_update) VALUES (?, ?) '
+    'ON CONFLICT(group_name) DO UPDATE SET last_update = excluded.last_update')
+_SQL_GET_LAST_UPDATE = 'SELECT last_update FROM metadata WHERE group_name = ?'
+_SQL_COUNT_ENTRIES = 'SELECT COUNT(*) FROM entries WHERE group_name = ?'
+_SQL_COUNT_ENTRIES_FILTERED = ('SELECT COUNT(*) FROM entries '
+                               'WHERE group_name = ? AND filtered = 1')
+
 class DataManager:
     """数据管理类，负责管理数据的持久化存储"""
     
@@ -29,24 +64,117 @@ class DataManager:
             config_manager: 配置管理器实例
         """
         self.config_manager = config_manager
-        self.data_dir = Path(config_manager.get_config('global.data_dir', './data'))
+        self.data_dir = Path(config_manager.data_dir)
         self.db_path = self.data_dir / 'rss_data.db'
         
         # 确保数据目录存在
         self.data_dir.mkdir(parents=True, exist_ok=True)
-        
+
+        # 长连接加锁串行化访问，避免每次操作重新建连
+        self._lock = threading.Lock()
+        self._conn = self._create_connection()
+
         # 初始化数据库
         self._init_database()
-        
+
+        # 进程退出前关闭连接
+        atexit.register(self._conn.close)
+
         logger.info("数据管理器初始化完成")
-    
+
+    def _create_connection(self) -> sqlite3.Connection:
+        """
+        创建长连接并应用PRAGMA调优
+
+        Returns:
+            配置好的数据库连接
+        """
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+
+        # WAL让写入不阻塞读取；NORMAL同步在WAL下足够安全且大幅减少fsync
+        conn.executescript(
+            'PRAGMA journal_mode=WAL;'
+            'PRAGMA synchronous=NORMAL;'
+            'PRAGMA temp_store=MEMORY;'
+            'PRAGMA mmap_size=268435456;'
+            'PRAGMA cache_size=-65536;'
+        )
+
+        # row_factory在连接上设置一次，所有查询直接返回Row
+        conn.row_factory = sqlite3.Row
+
+        return conn
+
+    @contextmanager
+    def _cursor(self):
+        """
+        获取持久连接上的游标（上下文管理器）
+
+        持锁覆盖整个操作，游标用完即关
+        """
+        with self._lock:
+            cursor = self._conn.cursor()
+            try:
+                yield cursor
+            finally:
+                cursor.close()
+
     def _init_database(self) -> None:
         """初始化数据库"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._conn
             cursor = conn.cursor()
-            
-            # 创建条目表
+
+            # 旧版本用ISO文本时间戳，迁移为INTEGER unix秒
+            # （published保持文本，它是feed原文、生成RSS时原样输出）
+            cursor.execute('PRAGMA table_info(entries)')
+            columns = {row[1]: (row[2] or '').upper() for row in cursor.fetchall()}
+
+            if columns and columns.get('created_at') == 'TEXT':
+                conn.executescript('''
+                ALTER TABLE entries RENAME TO entries_old;
+                CREATE TABLE entries (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    entry_id TEXT NOT NULL,
+                    group_name TEXT NOT NULL,
+                    title TEXT NOT NULL,
+                    link TEXT NOT NULL,
+                    published TEXT NOT NULL,
+                    content TEXT,
+                    summary TEXT,
+                    filtered INTEGER DEFAULT 0,
+                    created_at INTEGER NOT NULL,
+                    updated_at INTEGER NOT NULL,
+                    UNIQUE(entry_id, group_name)
+                );
+                INSERT INTO entries
+                SELECT id, entry_id, group_name, title, link, published, content,
+                       summary, filtered,
+                       CAST(strftime('%s', created_at) AS INTEGER),
+                       CAST(strftime('%s', updated_at) AS INTEGER)
+                FROM entries_old;
+                DROP TABLE entries_old;
+                ''')
+
+            cursor.execute('PRAGMA table_info(metadata)')
+            meta_columns = {row[1]: (row[2] or '').upper() for row in cursor.fetchall()}
+
+            if meta_columns and meta_columns.get('last_update') == 'TEXT':
+                conn.executescript('''
+                ALTER TABLE metadata RENAME TO metadata_old;
+                CREATE TABLE metadata (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    group_name TEXT NOT NULL,
+                    last_update INTEGER NOT NULL,
+                    UNIQUE(group_name)
+                );
+                INSERT INTO metadata
+                SELECT id, group_name, CAST(strftime('%s', last_update) AS INTEGER)
+                FROM metadata_old;
+                DROP TABLE metadata_old;
+                ''')
+
+            # 创建条目表（INTEGER时间戳：索引键更小、比较更快）
             cursor.execute('''
             CREATE TABLE IF NOT EXISTS entries (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -58,24 +186,43 @@ class DataManager:
                 content TEXT,
                 summary TEXT,
                 filtered INTEGER DEFAULT 0,
-                created_at TEXT NOT NULL,
-                updated_at TEXT NOT NULL,
+                created_at INTEGER NOT NULL,
+                updated_at INTEGER NOT NULL,
                 UNIQUE(entry_id, group_name)
             )
             ''')
             
+            # 热点查询的覆盖索引：按组取条目、按组取已过滤条目、按时间清理
+            cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_entries_group_published
+            ON entries(group_name, published DESC)
+            ''')
+
+            # filtered=1的查询高度选择性，部分索引只含匹配行、扫描页数最少；
+            # 取代早期版本的复合索引
+            cursor.execute('DROP INDEX IF EXISTS idx_entries_group_filtered_published')
+
+            cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_entries_filtered_published
+            ON entries(group_name, published DESC) WHERE filtered = 1
+            ''')
+
+            cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_entries_created_at
+            ON entries(created_at)
+            ''')
+
             # 创建元数据表
             cursor.execute('''
             CREATE TABLE IF NOT EXISTS metadata (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 group_name TEXT NOT NULL,
-                last_update TEXT NOT NULL,
+                last_update INTEGER NOT NULL,
                 UNIQUE(group_name)
             )
             ''')
             
             conn.commit()
-            conn.close()
             
             logger.info("数据库初始化完成")
         except Exception as e:
@@ -94,103 +241,162 @@ class DataManager:
             是否保存成功
         """
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            now = datetime.now().isoformat()
-            
+            now = int(time.time())
+
             # 准备数据
             entry_id = entry.get('id', '')
             title = entry.get('title', '')
             link = entry.get('link', '')
-            published = entry.get('published', now)
-            content = json.dumps(entry.get('content', ''))
+            published = entry.get('published', datetime.now().isoformat())
+            content = orjson.dumps(entry.get('content', '')).decode()
             summary = entry.get('summary', '')
             filtered = 1 if entry.get('filtered', False) else 0
-            
-            # 检查条目是否已存在
-            cursor.execute(
-                'SELECT id FROM entries WHERE entry_id = ? AND group_name = ?',
-                (entry_id, group_name)
-            )
-            result = cursor.fetchone()
-            
-            if result:
-                # 更新现有条目
-                cursor.execute('''
-                UPDATE entries
-                SET title = ?, link = ?, published = ?, content = ?, summary = ?, 
-                    filtered = ?, updated_at = ?
-                WHERE entry_id = ? AND group_name = ?
-                ''', (title, link, published, content, summary, filtered, now, entry_id, group_name))
-            else:
-                # 插入新条目
-                cursor.execute('''
-                INSERT INTO entries 
-                (entry_id, group_name, title, link, published, content, summary, 
-                 filtered, created_at, updated_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (entry_id, group_name, title, link, published, content, summary, 
-                      filtered, now, now))
-            
-            conn.commit()
-            conn.close()
-            
+
+            # 单条UPSERT代替先SELECT再INSERT/UPDATE，一次索引探测完成写入
+            with self._cursor() as cursor:
+                cursor.execute(_SQL_UPSERT_ENTRY,
+                               (entry_id, group_name, title, link, published, content,
+                                summary, filtered, now, now))
+
+                self._conn.commit()
+
             return True
         except Exception as e:
             logger.error(f"保存条目失败: {e}")
             return False
     
-    def get_entries(self, group_name: str, limit: Optional[int] = None, 
+    def save_entries(self, entries: List[Dict[str, Any]], group_name: str) -> bool:
+        """
+        批量保存RSS条目，所有行在单个事务内写入
+
+        相比逐条调用save_entry，避免了每行一次的隐式事务和fsync
+
+        Args:
+            entries: RSS条目列表
+            group_name: RSS组名称
+
+        Returns:
+            是否保存成功
+        """
+        if not entries:
+            return True
+
+        try:
+            now = int(time.time())
+            default_published = datetime.now().isoformat()
+
+            rows = [
+                (
+                    entry.get('id', ''),
+                    group_name,
+                    entry.get('title', ''),
+                    entry.get('link', ''),
+                    entry.get('published', default_published),
+                    orjson.dumps(entry.get('content', '')).decode(),
+                    entry.get('summary', ''),
+                    1 if entry.get('filtered', False) else 0,
+                    now,
+                    now
+                )
+                for entry in entries
+            ]
+
+            with self._lock:
+                # 分块写入，控制单个事务的体量
+                for start in range(0, len(rows), 500):
+                    with self._conn:
+                        self._conn.executemany(_SQL_UPSERT_ENTRY, rows[start:start + 500])
+
+            return True
+        except Exception as e:
+            logger.error(f"批量保存条目失败: {e}")
+            return False
+
+    @staticmethod
+    def _row_to_entry(row: sqlite3.Row) -> Dict[str, Any]:
+        """
+        将查询行转换为条目字典
+
+        按位置取列代替dict(row)，省去每行的列名哈希查找；
+        列顺序与entries建表语句一致
+
+        Args:
+            row: entries表的查询行
+
+        Returns:
+            RSS条目字典
+        """
+        content = row[6]
+        if content:
+            try:
+                content = orjson.loads(content)
+            except orjson.JSONDecodeError:
+                pass
+
+        return {
+            'id': row[0],
+            'entry_id': row[1],
+            'group_name': row[2],
+            'title': row[3],
+            'link': row[4],
+            'published': row[5],
+            'content': content,
+            'summary': row[7],
+            'filtered': row[8],
+            'created_at': row[9],
+            'updated_at': row[10],
+        }
+
+    def iter_entries(self, group_name: str, limit: Optional[int] = None,
+                     filtered_only: bool = False) -> Iterator[Dict[str, Any]]:
+        """
+        流式获取RSS条目
+
+        按批从游标取行、逐条yield，避免一次性物化整个结果集
+
+        Args:
+            group_name: RSS组名称
+            limit: 限制返回的条目数量
+            filtered_only: 是否只返回已过滤的条目
+
+        Yields:
+            RSS条目
+        """
+        try:
+            query = _SQL_GET_ENTRIES_FILTERED if filtered_only else _SQL_GET_ENTRIES
+
+            # 连接是共享的：执行和每批fetch都持锁，避免与写事务交错；
+            # 行转换和yield在锁外进行，批与批之间写入方可以插队
+            with self._lock:
+                cursor = self._conn.cursor()
+                cursor.execute(query, (group_name, limit if limit else -1))
+
+            while True:
+                with self._lock:
+                    rows = cursor.fetchmany(1024)
+
+                if not rows:
+                    break
+
+                for row in rows:
+                    yield self._row_to_entry(row)
+        except Exception as e:
+            logger.error(f"获取条目失败: {e}")
+
+    def get_entries(self, group_name: str, limit: Optional[int] = None,
                    filtered_only: bool = False) -> List[Dict[str, Any]]:
         """
         获取RSS条目
-        
+
         Args:
             group_name: RSS组名称
             limit: 限制返回的条目数量
             filtered_only: 是否只返回已过滤的条目
-        
+
         Returns:
             RSS条目列表
         """
-        try:
-            conn = sqlite3.connect(self.db_path)
-            conn.row_factory = sqlite3.Row
-            cursor = conn.cursor()
-            
-            query = 'SELECT * FROM entries WHERE group_name = ?'
-            params = [group_name]
-            
-            if filtered_only:
-                query += ' AND filtered = 1'
-            
-            query += ' ORDER BY published DESC'
-            
-            if limit:
-                query += f' LIMIT {limit}'
-            
-            cursor.execute(query, params)
-            rows = cursor.fetchall()
-            
-            entries = []
-            for row in rows:
-                entry = dict(row)
-                # 将JSON字符串转换回字典
-                if entry['content']:
-                    try:
-                        entry['content'] = json.loads(entry['content'])
-                    except:
-                        entry['content'] = entry['content']
-                
-                entries.append(entry)
-            
-            conn.close()
-            
-            return entries
-        except Exception as e:
-            logger.error(f"获取条目失败: {e}")
-            return []
+        return list(self.iter_entries(group_name, limit, filtered_only))
     
     def get_entry_by_id(self, entry_id: str, group_name: str) -> Optional[Dict[str, Any]]:
         """
@@ -204,29 +410,13 @@ class DataManager:
             RSS条目，如果不存在则返回None
         """
         try:
-            conn = sqlite3.connect(self.db_path)
-            conn.row_factory = sqlite3.Row
-            cursor = conn.cursor()
-            
-            cursor.execute(
-                'SELECT * FROM entries WHERE entry_id = ? AND group_name = ?',
-                (entry_id, group_name)
-            )
-            row = cursor.fetchone()
+            with self._cursor() as cursor:
+                cursor.execute(_SQL_GET_ENTRY_BY_ID, (entry_id, group_name))
+                row = cursor.fetchone()
             
             if row:
-                entry = dict(row)
-                # 将JSON字符串转换回字典
-                if entry['content']:
-                    try:
-                        entry['content'] = json.loads(entry['content'])
-                    except:
-                        entry['content'] = entry['content']
-                
-                conn.close()
-                return entry
+                return self._row_to_entry(row)
             
-            conn.close()
             return None
         except Exception as e:
             logger.error(f"获取条目失败: {e}")
@@ -244,26 +434,27 @@ class DataManager:
         """
         try:
             if days is None:
-                days = self.config_manager.get_config('global.data_retention_days', 90)
+                days = self.config_manager.data_retention_days
             
             if not isinstance(days, int) or days <= 0:
                 logger.warning(f"保留天数必须是正整数，使用默认值90")
                 days = 90
             
-            cutoff_date = (datetime.now() - timedelta(days=days)).isoformat()
-            
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute(
-                'DELETE FROM entries WHERE created_at < ?',
-                (cutoff_date,)
-            )
-            
-            deleted_count = cursor.rowcount
+            cutoff = int(time.time()) - days * 86400
             
-            conn.commit()
-            conn.close()
+            deleted_count = 0
+
+            # 分批删除，每批一个短事务，避免大表清理长时间持有写锁
+            with self._cursor() as cursor:
+                while True:
+                    cursor.execute(_SQL_DELETE_OLD_CHUNK, (cutoff,))
+
+                    self._conn.commit()
+
+                    if cursor.rowcount <= 0:
+                        break
+
+                    deleted_count += cursor.rowcount
             
             logger.info(f"已删除 {deleted_count} 条旧数据（超过 {days} 天）")
             
@@ -283,31 +474,14 @@ class DataManager:
             是否更新成功
         """
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            now = datetime.now().isoformat()
-            
-            cursor.execute(
-                'SELECT id FROM metadata WHERE group_name = ?',
-                (group_name,)
-            )
-            result = cursor.fetchone()
-            
-            if result:
-                cursor.execute(
-                    'UPDATE metadata SET last_update = ? WHERE group_name = ?',
-                    (now, group_name)
-                )
-            else:
-                cursor.execute(
-                    'INSERT INTO metadata (group_name, last_update) VALUES (?, ?)',
-                    (group_name, now)
-                )
-            
-            conn.commit()
-            conn.close()
-            
+            now = int(time.time())
+
+            # UPSERT代替先SELECT再INSERT/UPDATE
+            with self._cursor() as cursor:
+                cursor.execute(_SQL_UPSERT_METADATA, (group_name, now))
+
+                self._conn.commit()
+
             return True
         except Exception as e:
             logger.error(f"更新最后更新时间失败: {e}")
@@ -324,19 +498,12 @@ class DataManager:
             最后更新时间，如果不存在则返回None
         """
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute(
-                'SELECT last_update FROM metadata WHERE group_name = ?',
-                (group_name,)
-            )
-            result = cursor.fetchone()
-            
-            conn.close()
+            with self._cursor() as cursor:
+                cursor.execute(_SQL_GET_LAST_UPDATE, (group_name,))
+                result = cursor.fetchone()
             
             if result:
-                return datetime.fromisoformat(result[0])
+                return datetime.fromtimestamp(result[0])
             
             return None
         except Exception as e:
@@ -355,20 +522,12 @@ class DataManager:
             条目数量
         """
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            query = 'SELECT COUNT(*) FROM entries WHERE group_name = ?'
-            params = [group_name]
-            
-            if filtered_only:
-                query += ' AND filtered = 1'
-            
-            cursor.execute(query, params)
-            result = cursor.fetchone()
-            
-            conn.close()
-            
+            query = _SQL_COUNT_ENTRIES_FILTERED if filtered_only else _SQL_COUNT_ENTRIES
+
+            with self._cursor() as cursor:
+                cursor.execute(query, (group_name,))
+                result = cursor.fetchone()
+
             return result[0] if result else 0
         except Exception as e:
             logger.error(f"获取条目数量失败: {e}")
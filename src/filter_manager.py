@@ -1,11 +1,18 @@
 """
 过滤器模块，负责过滤和生成摘要
 """
+import re
 import logging
 import hashlib
 from typing import Any, Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor
 import time
 
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
 from src.config_manager import ConfigManager
 from src.llm_integrator import LLMIntegrator
 from src.cache_manager import CacheManager
@@ -17,6 +24,20 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# 预编译的肯定/否定判断正则，避免每次lower()拷贝和两趟子串扫描
+_YES_RE = re.compile(r'(是|yes)', re.I)
+_NO_RE = re.compile(r'(否|no)', re.I)
+
+# 正文归一化用的空白折叠正则
+_WS_RE = re.compile(r'\s+')
+
+# 缓存键哈希只需抗碰撞不需加密强度：优先xxh3，缺失时用BLAKE2b
+if xxhash is not None:
+    _hash_hex = xxhash.xxh3_64_hexdigest
+else:
+    def _hash_hex(data: bytes) -> str:
+        return hashlib.blake2b(data, digest_size=8).hexdigest()
+
 class FilterManager:
     """过滤器管理类，负责过滤和生成摘要"""
     
@@ -35,13 +56,17 @@ class FilterManager:
         
         logger.info("过滤器管理器初始化完成")
     
-    def filter_entry(self, entry: Dict[str, Any], group_name: str) -> bool:
+    def filter_entry(self, entry: Dict[str, Any], group_name: str, *,
+                     cache_hits: Optional[Dict[str, Any]] = None,
+                     fresh_results: Optional[Dict[str, Any]] = None) -> bool:
         """
         过滤条目
         
         Args:
             entry: RSS条目
             group_name: RSS组名称
+            cache_hits: 预取的缓存命中字典，命中时不再单独查缓存
+            fresh_results: 收集新结果的字典，提供时延后统一批量写缓存
         
         Returns:
             是否保留
@@ -70,9 +95,13 @@ class FilterManager:
         # 获取提供商
         provider = filter_config.get('provider')
         
-        # 尝试从缓存获取结果
+        # 尝试从缓存获取结果（优先用批量预取的命中）
         cache_key = f"filter:{group_name}:{self._get_entry_hash(entry)}"
-        cached_result = self.cache_manager.get(cache_key)
+
+        if cache_hits is not None and cache_key in cache_hits:
+            cached_result = cache_hits[cache_key]
+        else:
+            cached_result = self.cache_manager.get(cache_key)
         
         if cached_result is not None:
             logger.info(f"使用缓存的过滤结果: {entry.get('title', '')}, 结果: {cached_result}")
@@ -80,7 +109,25 @@ class FilterManager:
         
         # 构建过滤内容
         content = self._build_filter_content(entry)
-        
+
+        # 次级缓存：不同feed常以略有差异的标题转发同一篇文章，
+        # 标题哈希未命中时再按归一化正文哈希查一次
+        body_key = self._get_body_key(entry, group_name)
+        if body_key:
+            if cache_hits is not None and body_key in cache_hits:
+                cached_result = cache_hits[body_key]
+            else:
+                cached_result = self.cache_manager.get(body_key)
+
+            if cached_result is not None:
+                logger.info(f"使用正文哈希缓存的过滤结果: {entry.get('title', '')}, 结果: {cached_result}")
+                # 回填主键，下次直接命中
+                if fresh_results is not None:
+                    fresh_results[cache_key] = cached_result
+                else:
+                    self.cache_manager.set(cache_key, cached_result)
+                return cached_result
+
         # 构建过滤提示
         filter_prompt = f"""
         请根据以下条件判断文章是否符合要求：
@@ -104,10 +151,17 @@ class FilterManager:
             logger.info(f"过滤条目完成，耗时: {end_time - start_time:.2f}秒")
             
             # 解析结果
-            result = '是' in response.lower() or 'yes' in response.lower()
+            result = bool(_YES_RE.search(response))
             
-            # 缓存结果
-            self.cache_manager.set(cache_key, result)
+            # 缓存结果（批量模式下先收集，最后统一写入），主键和正文哈希键都写
+            if fresh_results is not None:
+                fresh_results[cache_key] = result
+                if body_key:
+                    fresh_results[body_key] = result
+            else:
+                self.cache_manager.set(cache_key, result)
+                if body_key:
+                    self.cache_manager.set(body_key, result)
             
             logger.info(f"过滤结果: {entry.get('title', '')}, 结果: {result}, 响应: {response}")
             
@@ -116,13 +170,186 @@ class FilterManager:
             logger.error(f"过滤条目异常: {e}")
             return True
     
-    def generate_summary(self, entry: Dict[str, Any], group_name: str) -> Optional[str]:
+    def filter_entries_batch(self, entries: List[Dict[str, Any]], group_name: str, *,
+                             cache_hits: Optional[Dict[str, Any]] = None,
+                             fresh_results: Optional[Dict[str, Any]] = None) -> List[bool]:
+        """
+        批量过滤条目，多个条目合并进一次LLM请求
+
+        LLM的成本和延迟按请求计，把一批条目编号后放进同一个提示词
+        可以把请求数摊薄；解析失败时回退到并发逐条过滤
+
+        Args:
+            entries: RSS条目列表
+            group_name: RSS组名称
+            cache_hits: 预取的缓存命中字典，命中时不再单独查缓存
+            fresh_results: 收集新结果的字典，提供时延后统一批量写缓存
+
+        Returns:
+            与条目顺序对应的保留标记列表
+        """
+        # 获取组配置
+        group_config = self.config_manager.get_group_config(group_name)
+        if not group_config:
+            logger.warning(f"RSS组 {group_name} 不存在，默认保留条目")
+            return [True] * len(entries)
+
+        # 获取过滤配置
+        filter_config = group_config.get('filter', {})
+        if not filter_config.get('enabled', False):
+            return [True] * len(entries)
+
+        prompt = filter_config.get('prompt', '')
+        if not prompt:
+            return [True] * len(entries)
+
+        provider = filter_config.get('provider')
+
+        # 命中缓存的条目不进提示词，只把缓存未命中的发给LLM
+        results: List[Optional[bool]] = [None] * len(entries)
+        pending = []
+
+        for i, entry in enumerate(entries):
+            cache_key = f"filter:{group_name}:{self._get_entry_hash(entry)}"
+
+            if cache_hits is not None and cache_key in cache_hits:
+                cached_result = cache_hits[cache_key]
+            else:
+                cached_result = self.cache_manager.get(cache_key)
+
+            if cached_result is not None:
+                results[i] = cached_result
+                continue
+
+            # 次级缓存：标题哈希未命中时再按归一化正文哈希查一次，
+            # 换标题转发的重复文章不进提示词
+            body_key = self._get_body_key(entry, group_name)
+            if body_key:
+                if cache_hits is not None and body_key in cache_hits:
+                    cached_result = cache_hits[body_key]
+                else:
+                    cached_result = self.cache_manager.get(body_key)
+
+                if cached_result is not None:
+                    logger.info(f"使用正文哈希缓存的过滤结果: {entry.get('title', '')}, 结果: {cached_result}")
+                    results[i] = cached_result
+
+                    # 回填主键，下次直接命中
+                    if fresh_results is not None:
+                        fresh_results[cache_key] = cached_result
+                    else:
+                        self.cache_manager.set(cache_key, cached_result)
+                    continue
+
+            pending.append(i)
+
+        if not pending:
+            return results
+
+        # 构建编号列表提示词
+        lines = []
+        for number, i in enumerate(pending, 1):
+            entry = entries[i]
+            content = self._build_filter_content(entry)
+            lines.append(f"{number}) 标题：{entry.get('title', '')}\n内容：{content}")
+
+        articles = '\n\n'.join(lines)
+        batch_prompt = f"""
+        请根据以下条件分别判断每篇文章是否符合要求：
+
+        {prompt}
+
+        文章列表：
+        {articles}
+
+        请按编号逐行回答"是"或"否"，表示是否保留对应文章，每行一个编号，
+        如"1) 是"，不要输出其他内容。
+        """
+
+        try:
+            logger.info(f"开始批量过滤条目，数量: {len(pending)}")
+            response = self.llm_integrator.generate_text(batch_prompt, provider)
+            decisions = self._parse_batch_response(response, len(pending))
+        except Exception as e:
+            logger.error(f"批量过滤条目异常: {e}")
+            decisions = None
+
+        # 解析失败时回退到并发逐条过滤
+        if decisions is None:
+            logger.warning("批量过滤结果解析失败，回退到逐条过滤")
+            concurrency = filter_config.get('concurrency', 8)
+
+            with ThreadPoolExecutor(max_workers=min(concurrency, len(pending))) as executor:
+                fallback = list(executor.map(
+                    lambda i: self.filter_entry(
+                        entries[i], group_name,
+                        cache_hits=cache_hits, fresh_results=fresh_results
+                    ),
+                    pending
+                ))
+
+            for i, decision in zip(pending, fallback):
+                results[i] = decision
+
+            return results
+
+        # 主键和正文哈希键都写，换标题的转发下次直接命中
+        for i, decision in zip(pending, decisions):
+            results[i] = decision
+            entry = entries[i]
+            cache_key = f"filter:{group_name}:{self._get_entry_hash(entry)}"
+            body_key = self._get_body_key(entry, group_name)
+
+            if fresh_results is not None:
+                fresh_results[cache_key] = decision
+                if body_key:
+                    fresh_results[body_key] = decision
+            else:
+                self.cache_manager.set(cache_key, decision)
+                if body_key:
+                    self.cache_manager.set(body_key, decision)
+
+        return results
+
+    def _parse_batch_response(self, response: str, expected: int) -> Optional[List[bool]]:
+        """
+        解析批量过滤的LLM响应
+
+        Args:
+            response: LLM响应文本
+            expected: 期望的判断数量
+
+        Returns:
+            保留标记列表，行数与期望不符时返回None
+        """
+        decisions = []
+
+        for line in response.splitlines():
+            line = line.strip()
+            if not line:
+                continue
+
+            if _YES_RE.search(line):
+                decisions.append(True)
+            elif _NO_RE.search(line):
+                decisions.append(False)
+
+        if len(decisions) != expected:
+            return None
+
+        return decisions
+
+    def generate_summary(self, entry: Dict[str, Any], group_name: str, *,
+                         cache_hits: Optional[Dict[str, Any]] = None,
+                         fresh_results: Optional[Dict[str, Any]] = None) -> Optional[str]:
         """
         生成摘要
         
         Args:
             entry: RSS条目
             group_name: RSS组名称
+            cache_hits: 预取的缓存命中字典，命中时不再单独查缓存
+            fresh_results: 收集新结果的字典，提供时延后统一批量写缓存
         
         Returns:
             摘要
@@ -148,9 +375,13 @@ class FilterManager:
         # 获取提供商
         provider = summary_config.get('provider')
         
-        # 尝试从缓存获取结果
+        # 尝试从缓存获取结果（优先用批量预取的命中）
         cache_key = f"summary:{group_name}:{self._get_entry_hash(entry)}"
-        cached_result = self.cache_manager.get(cache_key)
+
+        if cache_hits is not None and cache_key in cache_hits:
+            cached_result = cache_hits[cache_key]
+        else:
+            cached_result = self.cache_manager.get(cache_key)
         
         if cached_result is not None:
             logger.info(f"使用缓存的摘要结果: {entry.get('title', '')}")
@@ -181,8 +412,11 @@ class FilterManager:
             end_time = time.time()
             logger.info(f"生成摘要完成，耗时: {end_time - start_time:.2f}秒")
             
-            # 缓存结果
-            self.cache_manager.set(cache_key, summary)
+            # 缓存结果（批量模式下先收集，最后统一写入）
+            if fresh_results is not None:
+                fresh_results[cache_key] = summary
+            else:
+                self.cache_manager.set(cache_key, summary)
             
             logger.info(f"摘要结果: {entry.get('title', '')}, 长度: {len(summary)}")
             
@@ -221,31 +455,73 @@ class FilterManager:
             logger.info(f"RSS组 {group_name} 未启用过滤和摘要生成，跳过批量处理")
             return entries
         
-        # 批量处理条目
-        processed_entries = []
-        
+        # LLM调用纯粹是网络IO，批内并发可以重叠在途请求
+        concurrency = filter_config.get('concurrency', 8)
+
         logger.info(f"开始批量处理条目，总数: {len(entries)}")
         start_time = time.time()
-        
+
+        # 一次批量查询预取所有过滤/摘要缓存，避免每个条目各查一轮；
+        # 哈希和过滤内容顺便缓存在条目上，后续过滤/摘要不再重复计算
+        cache_keys = []
         for entry in entries:
-            # 过滤条目
+            entry_hash = self._get_entry_hash(entry)
+            entry['_hash'] = entry_hash
+            entry['_filter_content'] = self._build_filter_content(entry)
+
             if filter_enabled:
-                if not self.filter_entry(entry, group_name):
-                    logger.info(f"条目被过滤: {entry.get('title', '')}")
-                    continue
-            
-            # 生成摘要
+                cache_keys.append(f"filter:{group_name}:{entry_hash}")
+
+                # 正文哈希键一并预取，批量过滤靠它识别换标题的重复文章
+                body_key = self._get_body_key(entry, group_name)
+                if body_key:
+                    cache_keys.append(body_key)
             if summary_enabled:
-                summary = self.generate_summary(entry, group_name)
-                if summary:
-                    entry['summary'] = summary
-            
-            # 标记为已处理
+                cache_keys.append(f"summary:{group_name}:{entry_hash}")
+
+        cache_hits = self.cache_manager.get_many(cache_keys)
+        fresh_results: Dict[str, Any] = {}
+
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            # 先过滤：缓存未命中的条目合并进一次LLM请求，
+            # 解析失败时filter_entries_batch内部回退到并发逐条过滤
+            if filter_enabled:
+                keep_flags = self.filter_entries_batch(
+                    entries, group_name,
+                    cache_hits=cache_hits, fresh_results=fresh_results
+                )
+
+                processed_entries = []
+                for entry, keep in zip(entries, keep_flags):
+                    if keep:
+                        processed_entries.append(entry)
+                    else:
+                        logger.info(f"条目被过滤: {entry.get('title', '')}")
+            else:
+                processed_entries = list(entries)
+
+            # 再为保留的条目并发生成摘要
+            if summary_enabled:
+                summaries = list(executor.map(
+                    lambda e: self.generate_summary(
+                        e, group_name,
+                        cache_hits=cache_hits, fresh_results=fresh_results
+                    ),
+                    processed_entries
+                ))
+
+                for entry, summary in zip(processed_entries, summaries):
+                    if summary:
+                        entry['summary'] = summary
+
+        # 标记为已处理
+        for entry in processed_entries:
             entry['filtered'] = True
-            
-            # 添加到处理后的条目列表
-            processed_entries.append(entry)
-        
+
+        # 新结果统一批量写缓存
+        if fresh_results:
+            self.cache_manager.set_many(fresh_results)
+
         end_time = time.time()
         logger.info(f"批量处理条目完成，处理前: {len(entries)}，处理后: {len(processed_entries)}，耗时: {end_time - start_time:.2f}秒")
         
@@ -261,26 +537,21 @@ class FilterManager:
         Returns:
             过滤内容
         """
-        # 获取内容
-        content = entry.get('content', '')
-        
-        # 如果内容是字典，则获取值
-        if isinstance(content, dict):
+        # 批量处理时内容已预先计算并挂在条目上
+        precomputed = entry.get('_filter_content')
+        if precomputed is not None:
+            return precomputed
+
+        # 获取内容（type is比isinstance省去MRO查找，热路径上更快）
+        content = entry.get('content')
+
+        if type(content) is dict:
             content = content.get('value', '')
-        
-        # 如果内容是列表，则获取第一个元素的值
-        elif isinstance(content, list) and len(content) > 0:
+        elif type(content) is list and content:
             content = content[0].get('value', '')
-        
-        # 如果没有内容，则使用摘要
-        if not content:
-            content = entry.get('summary', '')
-        
-        # 如果没有摘要，则使用描述
-        if not content:
-            content = entry.get('description', '')
-        
-        return content
+
+        # 内容为空时依次回退到摘要、描述
+        return content or entry.get('summary') or entry.get('description') or ''
     
     def _get_entry_hash(self, entry: Dict[str, Any]) -> str:
         """
@@ -292,9 +563,40 @@ class FilterManager:
         Returns:
             条目哈希
         """
+        # 批量处理时哈希已预先计算并挂在条目上
+        precomputed = entry.get('_hash')
+        if precomputed is not None:
+            return precomputed
+
         # 使用标题和链接生成哈希
         title = entry.get('title', '')
         link = entry.get('link', '')
-        
+
         # 生成哈希
-        return hashlib.md5(f"{title}{link}".encode()).hexdigest()
+        return _hash_hex(f"{title}{link}".encode())
+
+    def _get_body_key(self, entry: Dict[str, Any], group_name: str) -> Optional[str]:
+        """
+        获取条目的归一化正文缓存键
+
+        Args:
+            entry: RSS条目
+            group_name: RSS组名称
+
+        Returns:
+            正文哈希缓存键，正文为空时返回None
+        """
+        # 批量处理时键已预先计算并挂在条目上
+        precomputed = entry.get('_body_key')
+        if precomputed is not None:
+            return precomputed
+
+        content = self._build_filter_content(entry)
+        if not content:
+            return None
+
+        normalized = _WS_RE.sub(' ', content.lower())
+        body_key = f"filter:body:{group_name}:{_hash_hex(normalized.encode())}"
+        entry['_body_key'] = body_key
+
+        return body_key
@@ -3,13 +3,23 @@ LLM集成模块，提供统一的LLM API接口
 """
 import os
 import logging
-import json
+import orjson
 import time
 import hashlib
+import threading
+
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any, Dict, List, Optional
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
-from src.config_manager import ConfigManager
+from src.config_manager import ConfigManager, K_LLM
 from src.cache_manager import CacheManager
 
 # 设置日志
@@ -19,6 +29,17 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# 连接超时5秒、读取超时60秒，避免挂起的API调用永久阻塞
+_REQUEST_TIMEOUT = (5, 60)
+
+# 缓存键哈希：xxh3比MD5快一个量级，提示词可达几十KB时差距明显
+# 不可用时回退到BLAKE2b（标准库中最快的选择）
+if xxhash is not None:
+    _hash_hex = xxhash.xxh3_64_hexdigest
+else:
+    def _hash_hex(data: bytes) -> str:
+        return hashlib.blake2b(data, digest_size=8).hexdigest()
+
 class LLMIntegrator:
     """LLM集成类，提供统一的LLM API接口"""
     
@@ -34,55 +55,184 @@ class LLMIntegrator:
         self.cache_manager = cache_manager
         
         # 获取LLM配置
-        self.llm_config = self.config_manager.get_config('llm', {})
+        self.llm_config = self.config_manager.get_config_tuple(K_LLM, {})
         
         # 获取默认提供商
         self.default_provider = self.llm_config.get('default_provider', 'openai')
         
         # 初始化API密钥
         self._init_api_keys()
-        
+
+        # 每个提供商一个长连接会话，复用TCP/TLS连接
+        self._sessions: Dict[str, requests.Session] = {}
+        self._sessions_lock = threading.Lock()
+
+        # 相同提示词的并发调用合并为一次API请求（single-flight）
+        self._inflight: Dict[str, threading.Lock] = {}
+        self._inflight_lock = threading.Lock()
+
+        # 进程内LRU前置缓存：热提示词的结果直接从字典取，不经过下层缓存
+        self._mem_cache: 'OrderedDict[str, str]' = OrderedDict()
+        self._mem_cache_size = self.llm_config.get('mem_cache_size', 1024)
+        self._mem_cache_lock = threading.Lock()
+
+        # 预解析各提供商的URL、请求头、模型和密钥，热路径免去逐次查配置
+        self._providers = self._build_providers()
+
         logger.info("LLM集成器初始化完成")
+
+    def _build_providers(self) -> Dict[str, Dict[str, Any]]:
+        """
+        构建提供商调用注册表
+
+        每个提供商的URL、请求头、模型和API密钥在初始化时解析一次，
+        generate_text调用时直接取用，不再逐次读配置、环境变量和if/elif分发
+
+        Returns:
+            提供商名称到调用信息字典的映射
+        """
+        llm_config = self.llm_config
+
+        openai_config = llm_config.get('openai', {})
+        openai_key = self._api_keys['openai']
+        openai_base = openai_config.get('base_url', 'https://api.openai.com/v1')
+
+        gemini_config = llm_config.get('gemini', {})
+        gemini_key = self._api_keys['gemini']
+        gemini_base = gemini_config.get('base_url', 'https://generativelanguage.googleapis.com/v1')
+        gemini_model = gemini_config.get('model', 'gemini-pro')
+
+        claude_config = llm_config.get('claude', {})
+        claude_key = self._api_keys['claude']
+        claude_base = claude_config.get('base_url', 'https://api.anthropic.com/v1')
+
+        ollama_config = llm_config.get('ollama', {})
+        ollama_base = ollama_config.get('base_url', 'http://localhost:11434/api')
+
+        deepseek_config = llm_config.get('deepseek', {})
+        deepseek_key = self._api_keys['deepseek']
+        deepseek_base = deepseek_config.get('base_url', 'https://api.deepseek.com/v1')
+
+        azure_config = llm_config.get('azure', {})
+        azure_key = self._api_keys['azure']
+        azure_base = os.environ.get('AZURE_ENDPOINT') or azure_config.get('base_url', '')
+        azure_deployment = (os.environ.get('AZURE_DEPLOYMENT_ID')
+                            or azure_config.get('deployment_id', ''))
+        azure_version = azure_config.get('api_version', '2023-05-15')
+
+        return {
+            'openai': {
+                'fn': self._call_openai,
+                'url': f"{openai_base}/chat/completions",
+                'headers': {
+                    "Content-Type": "application/json",
+                    "Authorization": f"Bearer {openai_key}"
+                },
+                'model': openai_config.get('model', 'gpt-3.5-turbo'),
+                'api_key': openai_key
+            },
+            'gemini': {
+                'fn': self._call_gemini,
+                'url': f"{gemini_base}/models/{gemini_model}:generateContent?key={gemini_key}",
+                'headers': {"Content-Type": "application/json"},
+                'model': gemini_model,
+                'api_key': gemini_key
+            },
+            'claude': {
+                'fn': self._call_claude,
+                'url': f"{claude_base}/messages",
+                'headers': {
+                    "Content-Type": "application/json",
+                    "x-api-key": claude_key,
+                    "anthropic-version": "2023-06-01"
+                },
+                'model': claude_config.get('model', 'claude-2'),
+                'api_key': claude_key
+            },
+            'ollama': {
+                'fn': self._call_ollama,
+                'url': f"{ollama_base}/generate",
+                'headers': {"Content-Type": "application/json"},
+                'model': ollama_config.get('model', 'llama2'),
+                'api_key': ''
+            },
+            'deepseek': {
+                'fn': self._call_deepseek,
+                'url': f"{deepseek_base}/chat/completions",
+                'headers': {
+                    "Content-Type": "application/json",
+                    "Authorization": f"Bearer {deepseek_key}"
+                },
+                'model': deepseek_config.get('model', 'deepseek-chat'),
+                'api_key': deepseek_key
+            },
+            'azure': {
+                'fn': self._call_azure,
+                'url': (f"{azure_base}/openai/deployments/{azure_deployment}"
+                        f"/chat/completions?api-version={azure_version}"),
+                'headers': {
+                    "Content-Type": "application/json",
+                    "api-key": azure_key
+                },
+                'model': azure_deployment,
+                'api_key': azure_key
+            }
+        }
+
+    def _get_session(self, provider: str) -> requests.Session:
+        """
+        获取提供商的HTTP会话（懒创建，带连接池和重试）
+
+        复用会话省去每次请求的DNS解析和TLS握手；
+        瞬时错误（429/5xx）按退避自动重试
+
+        Args:
+            provider: 提供商名称
+
+        Returns:
+            配置好的requests会话
+        """
+        session = self._sessions.get(provider)
+        if session is None:
+            with self._sessions_lock:
+                session = self._sessions.get(provider)
+                if session is None:
+                    session = requests.Session()
+                    adapter = HTTPAdapter(
+                        pool_connections=10,
+                        pool_maxsize=50,
+                        max_retries=Retry(
+                            total=3,
+                            backoff_factor=0.3,
+                            status_forcelist=[429, 500, 502, 503, 504],
+                            # 默认的allowed_methods不含POST，而这里全是POST；
+                            # 失败响应不计费、结果按键缓存，重试代价可接受
+                            allowed_methods=frozenset({'POST'})
+                        )
+                    )
+                    session.mount('https://', adapter)
+                    session.mount('http://', adapter)
+                    self._sessions[provider] = session
+        return session
     
     def _init_api_keys(self) -> None:
-        """初始化API密钥"""
-        # OpenAI
-        openai_api_key = os.environ.get('OPENAI_API_KEY')
-        if not openai_api_key:
-            openai_api_key = self.llm_config.get('openai', {}).get('api_key', '')
-        
-        if not openai_api_key:
-            logger.warning("OpenAI API密钥未设置")
-        
-        # Gemini
-        gemini_api_key = os.environ.get('GEMINI_API_KEY')
-        if not gemini_api_key:
-            gemini_api_key = self.llm_config.get('gemini', {}).get('api_key', '')
-        
-        if not gemini_api_key:
-            logger.warning("Gemini API密钥未设置")
-        
-        # Claude
-        claude_api_key = os.environ.get('CLAUDE_API_KEY')
-        if not claude_api_key:
-            claude_api_key = self.llm_config.get('claude', {}).get('api_key', '')
-        
-        if not claude_api_key:
-            logger.warning("Claude API密钥未设置")
-        
-        # Deepseek
-        deepseek_api_key = os.environ.get('DEEPSEEK_API_KEY')
-        if not deepseek_api_key:
-            deepseek_api_key = self.llm_config.get('deepseek', {}).get('api_key', '')
-        
-        if not deepseek_api_key:
-            logger.warning("Deepseek API密钥未设置")
-        
-        # Azure
-        azure_api_key = os.environ.get('AZURE_API_KEY')
-        if not azure_api_key:
-            azure_api_key = self.llm_config.get('azure', {}).get('api_key', '')
-        
+        """初始化API密钥（环境变量优先，解析一次后常驻实例）"""
+        self._api_keys: Dict[str, str] = {}
+
+        # ollama无需密钥，不在此列
+        for provider, label in (('openai', 'OpenAI'), ('gemini', 'Gemini'),
+                                ('claude', 'Claude'), ('deepseek', 'Deepseek'),
+                                ('azure', 'Azure')):
+            api_key = os.environ.get(f'{provider.upper()}_API_KEY')
+            if not api_key:
+                api_key = self.llm_config.get(provider, {}).get('api_key', '')
+
+            self._api_keys[provider] = api_key
+
+            if not api_key and provider != 'azure':
+                logger.warning(f"{label} API密钥未设置")
+
+        # Azure还需要端点和部署ID
         azure_endpoint = os.environ.get('AZURE_ENDPOINT')
         if not azure_endpoint:
             azure_endpoint = self.llm_config.get('azure', {}).get('base_url', '')
@@ -91,9 +241,44 @@ class LLMIntegrator:
         if not azure_deployment_id:
             azure_deployment_id = self.llm_config.get('azure', {}).get('deployment_id', '')
         
-        if not azure_api_key or not azure_endpoint or not azure_deployment_id:
+        if not self._api_keys['azure'] or not azure_endpoint or not azure_deployment_id:
             logger.warning("Azure API配置不完整")
     
+    @staticmethod
+    def _cache_key(provider: str, prompt: str) -> str:
+        """
+        计算LLM结果的缓存键
+
+        Args:
+            provider: 提供商
+            prompt: 提示词
+
+        Returns:
+            缓存键
+        """
+        return f"llm:{provider}:{_hash_hex(prompt.encode())}"
+
+    def _mem_cache_put(self, cache_key: str, result: str) -> None:
+        """
+        写入进程内LRU缓存
+
+        错误结果不进LRU（它们只应短暂存活于负缓存），
+        超出容量时逐出最久未使用的条目
+
+        Args:
+            cache_key: 缓存键
+            result: 生成的文本
+        """
+        if result.startswith('错误:'):
+            return
+
+        with self._mem_cache_lock:
+            self._mem_cache[cache_key] = result
+            self._mem_cache.move_to_end(cache_key)
+
+            while len(self._mem_cache) > self._mem_cache_size:
+                self._mem_cache.popitem(last=False)
+
     def generate_text(self, prompt: str, provider: Optional[str] = None) -> str:
         """
         生成文本
@@ -109,52 +294,69 @@ class LLMIntegrator:
         if not provider:
             provider = self.default_provider
         
-        # 获取提供商配置
-        provider_config = self.llm_config.get(provider, {})
-        
-        # 获取API密钥
-        api_key = os.environ.get(f'{provider.upper()}_API_KEY')
-        if not api_key:
-            api_key = provider_config.get('api_key', '')
+        # 获取预解析的提供商调用信息
+        provider_info = self._providers.get(provider)
+        if provider_info is None:
+            logger.error(f"不支持的提供商: {provider}")
+            return f"错误: 不支持的提供商 {provider}"
         
         # 如果API密钥未设置，则返回错误
-        if not api_key and provider not in ['ollama']:
+        if not provider_info['api_key'] and provider != 'ollama':
             logger.error(f"{provider} API密钥未设置")
             return f"错误: {provider} API密钥未设置"
         
+        cache_key = self._cache_key(provider, prompt)
+
+        # 先查进程内LRU，命中时连下层缓存的反序列化开销都省掉
+        with self._mem_cache_lock:
+            if cache_key in self._mem_cache:
+                self._mem_cache.move_to_end(cache_key)
+                return self._mem_cache[cache_key]
+
         # 获取缓存
-        cache_key = f"llm:{provider}:{hashlib.md5(prompt.encode()).hexdigest()}"
         cached_result = self.cache_manager.get(cache_key)
         
         if cached_result is not None:
             logger.info(f"使用缓存的LLM结果，提供商: {provider}")
+            self._mem_cache_put(cache_key, cached_result)
             return cached_result
-        
-        # 根据提供商调用不同的API
-        try:
-            if provider == 'openai':
-                result = self._call_openai(prompt, provider_config, api_key)
-            elif provider == 'gemini':
-                result = self._call_gemini(prompt, provider_config, api_key)
-            elif provider == 'claude':
-                result = self._call_claude(prompt, provider_config, api_key)
-            elif provider == 'ollama':
-                result = self._call_ollama(prompt, provider_config)
-            elif provider == 'deepseek':
-                result = self._call_deepseek(prompt, provider_config, api_key)
-            elif provider == 'azure':
-                result = self._call_azure(prompt, provider_config, api_key)
-            else:
-                logger.error(f"不支持的提供商: {provider}")
-                return f"错误: 不支持的提供商 {provider}"
-            
-            # 缓存结果
-            self.cache_manager.set(cache_key, result)
-            
-            return result
-        except Exception as e:
-            logger.error(f"调用LLM API异常: {e}")
-            return f"错误: 调用LLM API异常 {e}"
+
+        # 同一提示词的并发调用共用一把锁，只有第一个线程真正发请求
+        with self._inflight_lock:
+            key_lock = self._inflight.setdefault(cache_key, threading.Lock())
+
+        with key_lock:
+            try:
+                # 等锁期间结果可能已被先行线程写入缓存，二次检查
+                cached_result = self.cache_manager.get(cache_key)
+                if cached_result is not None:
+                    logger.info(f"使用缓存的LLM结果，提供商: {provider}")
+                    return cached_result
+
+                # 调用提供商API
+                try:
+                    result = provider_info['fn'](prompt, provider_info)
+                except Exception as e:
+                    logger.error(f"调用LLM API异常: {e}")
+                    result = f"错误: 调用LLM API异常 {e}"
+
+                if result.startswith('错误:'):
+                    # 负缓存：短窗口内不再反复请求故障中的提供商
+                    # （原先错误结果被无限期缓存）
+                    self.cache_manager.set(
+                        cache_key, result,
+                        ttl=self.llm_config.get('error_cache_ttl', 30))
+                else:
+                    # 成功结果设置有限TTL，控制陈旧内容的存活时间
+                    self.cache_manager.set(
+                        cache_key, result,
+                        ttl=self.llm_config.get('cache_ttl', 86400))
+                    self._mem_cache_put(cache_key, result)
+
+                return result
+            finally:
+                with self._inflight_lock:
+                    self._inflight.pop(cache_key, None)
     
     def batch_generate_text(self, prompts: List[str], provider: Optional[str] = None) -> List[str]:
         """
@@ -167,83 +369,198 @@ class LLMIntegrator:
         Returns:
             生成的文本列表
         """
-        results = []
-        
-        for prompt in prompts:
-            result = self.generate_text(prompt, provider)
-            results.append(result)
-        
+        if not provider:
+            provider = self.default_provider
+
+        if len(prompts) <= 1:
+            return [self.generate_text(prompt, provider) for prompt in prompts]
+
+        # 先查缓存，只有未命中的提示词才进入批量请求
+        results: List[Optional[str]] = [None] * len(prompts)
+        miss_indices = []
+
+        for i, prompt in enumerate(prompts):
+            cached = self.cache_manager.get(self._cache_key(provider, prompt))
+            if cached is not None:
+                results[i] = cached
+            else:
+                miss_indices.append(i)
+
+        batch_size = self.llm_config.get('batch_size', 8)
+
+        # 多个提示词合并为一次请求，摊薄每次调用的网络和提示词开销
+        for start in range(0, len(miss_indices), batch_size):
+            group = miss_indices[start:start + batch_size]
+
+            answers = None
+            if batch_size > 1 and len(group) > 1:
+                answers = self._generate_batched(
+                    [prompts[i] for i in group], provider)
+
+            if answers is not None:
+                for i, answer in zip(group, answers):
+                    results[i] = answer
+                    self.cache_manager.set(self._cache_key(provider, prompts[i]), answer)
+            else:
+                # 批量路径不可用或解析失败，回退为并发的逐条调用
+                # 网络IO为主，线程池把总耗时从各请求之和压到最慢一个
+                concurrency = self.llm_config.get('concurrency', 8)
+
+                with ThreadPoolExecutor(max_workers=min(len(group), concurrency)) as executor:
+                    answers = list(executor.map(
+                        lambda i: self.generate_text(prompts[i], provider),
+                        group
+                    ))
+
+                for i, answer in zip(group, answers):
+                    results[i] = answer
+
         return results
+
+    def _generate_batched(self, prompts: List[str], provider: str) -> Optional[List[str]]:
+        """
+        将多个提示词合并为一次LLM请求
+
+        要求模型以JSON数组逐条作答；数量对不上或解析失败返回None，
+        由调用方回退为逐条请求
+
+        Args:
+            prompts: 提示词列表
+            provider: 提供商
+
+        Returns:
+            与prompts等长的回答列表，失败时返回None
+        """
+        if provider not in ('openai', 'deepseek', 'azure'):
+            # 其他提供商未验证批量输出格式，走逐条路径
+            return None
+
+        provider_info = self._providers[provider]
+
+        numbered = '\n'.join(f"{i + 1}. {p}" for i, p in enumerate(prompts))
+        combined = (
+            "对下面每个编号条目分别作答，只返回一个JSON对象："
+            '{"answers": ["第1条的答案", "第2条的答案", ...]}。'
+            "answers数组长度必须等于条目数，顺序与编号一致，不要输出其他内容。\n\n"
+            f"{numbered}"
+        )
+
+        try:
+            response = provider_info['fn'](combined, provider_info)
+
+            if response.startswith('错误:'):
+                return None
+
+            # 模型偶尔会包一层Markdown代码块，剥掉后再解析
+            body = response.strip()
+            if body.startswith('```'):
+                body = body.strip('`')
+                body = body.removeprefix('json').strip()
+
+            answers = orjson.loads(body).get('answers')
+        except Exception as e:
+            logger.warning(f"批量LLM响应解析失败，回退为逐条请求: {e}")
+            return None
+
+        if not isinstance(answers, list) or len(answers) != len(prompts):
+            logger.warning(
+                f"批量LLM回答数量不匹配（期望{len(prompts)}），回退为逐条请求")
+            return None
+
+        return [str(answer) for answer in answers]
     
-    def _call_openai(self, prompt: str, config: Dict[str, Any], api_key: str) -> str:
+    @staticmethod
+    def _read_sse_stream(response: requests.Response) -> str:
+        """
+        逐行读取SSE流式响应并拼接文本
+
+        流式读取按块消费响应体，不在内存里保留完整副本；
+        适用于OpenAI兼容的chat-completions事件流
+
+        Args:
+            response: stream=True的HTTP响应
+
+        Returns:
+            拼接后的完整文本
+        """
+        parts = []
+
+        for line in response.iter_lines():
+            if not line.startswith(b'data: '):
+                continue
+
+            payload = line[6:]
+            if payload == b'[DONE]':
+                break
+
+            try:
+                delta = orjson.loads(payload).get('choices', [{}])[0].get('delta', {})
+            except orjson.JSONDecodeError:
+                continue
+
+            piece = delta.get('content')
+            if piece:
+                parts.append(piece)
+
+        return ''.join(parts)
+
+    def _call_openai(self, prompt: str, provider_info: Dict[str, Any]) -> str:
         """
         调用OpenAI API
         
         Args:
             prompt: 提示词
-            config: 配置
-            api_key: API密钥
+            provider_info: 预解析的提供商调用信息
         
         Returns:
             生成的文本
         """
-        # 获取配置
-        base_url = config.get('base_url', 'https://api.openai.com/v1')
-        model = config.get('model', 'gpt-3.5-turbo')
-        
         # 构建请求
-        url = f"{base_url}/chat/completions"
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {api_key}"
-        }
         data = {
-            "model": model,
+            "model": provider_info['model'],
             "messages": [
                 {"role": "system", "content": "You are a helpful assistant."},
                 {"role": "user", "content": prompt}
             ],
-            "temperature": 0.7
+            "temperature": 0.7,
+            "stream": True
         }
         
         # 发送请求
-        logger.info(f"调用OpenAI API，模型: {model}")
-        response = requests.post(url, headers=headers, json=data)
+        logger.info(f"调用OpenAI API，模型: {provider_info['model']}")
+        response = self._get_session('openai').post(
+            provider_info['url'], headers=provider_info['headers'],
+            data=orjson.dumps(data), timeout=_REQUEST_TIMEOUT, stream=True)
         
         # 检查响应
         if response.status_code != 200:
             logger.error(f"OpenAI API返回错误: {response.status_code}, {response.text}")
             return f"错误: OpenAI API返回 {response.status_code}"
+
+        # 流式读取响应；服务端不支持流式时按普通JSON解析
+        if 'text/event-stream' in response.headers.get('Content-Type', ''):
+            return self._read_sse_stream(response)
         
         # 解析响应
-        result = response.json()
+        result = orjson.loads(response.content)
         
         # 提取文本
         text = result.get('choices', [{}])[0].get('message', {}).get('content', '')
         
         return text
     
-    def _call_gemini(self, prompt: str, config: Dict[str, Any], api_key: str) -> str:
+    def _call_gemini(self, prompt: str, provider_info: Dict[str, Any]) -> str:
         """
         调用Gemini API
         
         Args:
             prompt: 提示词
-            config: 配置
-            api_key: API密钥
+            provider_info: 预解析的提供商调用信息
         
         Returns:
             生成的文本
         """
-        # 获取配置
-        base_url = config.get('base_url', 'https://generativelanguage.googleapis.com/v1')
-        model = config.get('model', 'gemini-pro')
-        
         # 构建请求
-        url = f"{base_url}/models/{model}:generateContent?key={api_key}"
-        headers = {
-            "Content-Type": "application/json"
-        }
         data = {
             "contents": [
                 {
@@ -258,8 +575,10 @@ class LLMIntegrator:
         }
         
         # 发送请求
-        logger.info(f"调用Gemini API，模型: {model}")
-        response = requests.post(url, headers=headers, json=data)
+        logger.info(f"调用Gemini API，模型: {provider_info['model']}")
+        response = self._get_session('gemini').post(
+            provider_info['url'], headers=provider_info['headers'],
+            data=orjson.dumps(data), timeout=_REQUEST_TIMEOUT)
         
         # 检查响应
         if response.status_code != 200:
@@ -267,38 +586,27 @@ class LLMIntegrator:
             return f"错误: Gemini API返回 {response.status_code}"
         
         # 解析响应
-        result = response.json()
+        result = orjson.loads(response.content)
         
         # 提取文本
         text = result.get('candidates', [{}])[0].get('content', {}).get('parts', [{}])[0].get('text', '')
         
         return text
     
-    def _call_claude(self, prompt: str, config: Dict[str, Any], api_key: str) -> str:
+    def _call_claude(self, prompt: str, provider_info: Dict[str, Any]) -> str:
         """
         调用Claude API
         
         Args:
             prompt: 提示词
-            config: 配置
-            api_key: API密钥
+            provider_info: 预解析的提供商调用信息
         
         Returns:
             生成的文本
         """
-        # 获取配置
-        base_url = config.get('base_url', 'https://api.anthropic.com/v1')
-        model = config.get('model', 'claude-2')
-        
         # 构建请求
-        url = f"{base_url}/messages"
-        headers = {
-            "Content-Type": "application/json",
-            "x-api-key": api_key,
-            "anthropic-version": "2023-06-01"
-        }
         data = {
-            "model": model,
+            "model": provider_info['model'],
             "messages": [
                 {"role": "user", "content": prompt}
             ],
@@ -306,8 +614,10 @@ class LLMIntegrator:
         }
         
         # 发送请求
-        logger.info(f"调用Claude API，模型: {model}")
-        response = requests.post(url, headers=headers, json=data)
+        logger.info(f"调用Claude API，模型: {provider_info['model']}")
+        response = self._get_session('claude').post(
+            provider_info['url'], headers=provider_info['headers'],
+            data=orjson.dumps(data), timeout=_REQUEST_TIMEOUT)
         
         # 检查响应
         if response.status_code != 200:
@@ -315,41 +625,35 @@ class LLMIntegrator:
             return f"错误: Claude API返回 {response.status_code}"
         
         # 解析响应
-        result = response.json()
+        result = orjson.loads(response.content)
         
         # 提取文本
         text = result.get('content', [{}])[0].get('text', '')
         
         return text
     
-    def _call_ollama(self, prompt: str, config: Dict[str, Any]) -> str:
+    def _call_ollama(self, prompt: str, provider_info: Dict[str, Any]) -> str:
         """
         调用Ollama API
         
         Args:
             prompt: 提示词
-            config: 配置
+            provider_info: 预解析的提供商调用信息
         
         Returns:
             生成的文本
         """
-        # 获取配置
-        base_url = config.get('base_url', 'http://localhost:11434/api')
-        model = config.get('model', 'llama2')
-        
         # 构建请求
-        url = f"{base_url}/generate"
-        headers = {
-            "Content-Type": "application/json"
-        }
         data = {
-            "model": model,
+            "model": provider_info['model'],
             "prompt": prompt
         }
         
         # 发送请求
-        logger.info(f"调用Ollama API，模型: {model}")
-        response = requests.post(url, headers=headers, json=data)
+        logger.info(f"调用Ollama API，模型: {provider_info['model']}")
+        response = self._get_session('ollama').post(
+            provider_info['url'], headers=provider_info['headers'],
+            data=orjson.dumps(data), timeout=_REQUEST_TIMEOUT)
         
         # 检查响应
         if response.status_code != 200:
@@ -357,103 +661,96 @@ class LLMIntegrator:
             return f"错误: Ollama API返回 {response.status_code}"
         
         # 解析响应
-        result = response.json()
+        result = orjson.loads(response.content)
         
         # 提取文本
         text = result.get('response', '')
         
         return text
     
-    def _call_deepseek(self, prompt: str, config: Dict[str, Any], api_key: str) -> str:
+    def _call_deepseek(self, prompt: str, provider_info: Dict[str, Any]) -> str:
         """
         调用Deepseek API
         
         Args:
             prompt: 提示词
-            config: 配置
-            api_key: API密钥
+            provider_info: 预解析的提供商调用信息
         
         Returns:
             生成的文本
         """
-        # 获取配置
-        base_url = config.get('base_url', 'https://api.deepseek.com/v1')
-        model = config.get('model', 'deepseek-chat')
-        
         # 构建请求
-        url = f"{base_url}/chat/completions"
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {api_key}"
-        }
         data = {
-            "model": model,
+            "model": provider_info['model'],
             "messages": [
                 {"role": "system", "content": "You are a helpful assistant."},
                 {"role": "user", "content": prompt}
             ],
-            "temperature": 0.7
+            "temperature": 0.7,
+            "stream": True
         }
         
         # 发送请求
-        logger.info(f"调用Deepseek API，模型: {model}")
-        response = requests.post(url, headers=headers, json=data)
+        logger.info(f"调用Deepseek API，模型: {provider_info['model']}")
+        response = self._get_session('deepseek').post(
+            provider_info['url'], headers=provider_info['headers'],
+            data=orjson.dumps(data), timeout=_REQUEST_TIMEOUT, stream=True)
         
         # 检查响应
         if response.status_code != 200:
             logger.error(f"Deepseek API返回错误: {response.status_code}, {response.text}")
             return f"错误: Deepseek API返回 {response.status_code}"
+
+        # 流式读取响应；服务端不支持流式时按普通JSON解析
+        if 'text/event-stream' in response.headers.get('Content-Type', ''):
+            return self._read_sse_stream(response)
         
         # 解析响应
-        result = response.json()
+        result = orjson.loads(response.content)
         
         # 提取文本
         text = result.get('choices', [{}])[0].get('message', {}).get('content', '')
         
         return text
     
-    def _call_azure(self, prompt: str, config: Dict[str, Any], api_key: str) -> str:
+    def _call_azure(self, prompt: str, provider_info: Dict[str, Any]) -> str:
         """
         调用Azure OpenAI API
         
         Args:
             prompt: 提示词
-            config: 配置
-            api_key: API密钥
+            provider_info: 预解析的提供商调用信息
         
         Returns:
             生成的文本
         """
-        # 获取配置
-        base_url = config.get('base_url', '')
-        deployment_id = config.get('deployment_id', '')
-        api_version = config.get('api_version', '2023-05-15')
-        
         # 构建请求
-        url = f"{base_url}/openai/deployments/{deployment_id}/chat/completions?api-version={api_version}"
-        headers = {
-            "Content-Type": "application/json",
-            "api-key": api_key
-        }
         data = {
             "messages": [
                 {"role": "system", "content": "You are a helpful assistant."},
                 {"role": "user", "content": prompt}
             ],
-            "temperature": 0.7
+            "temperature": 0.7,
+            "stream": True
         }
         
         # 发送请求
-        logger.info(f"调用Azure OpenAI API，部署ID: {deployment_id}")
-        response = requests.post(url, headers=headers, json=data)
+        logger.info(f"调用Azure OpenAI API，部署ID: {provider_info['model']}")
+        response = self._get_session('azure').post(
+            provider_info['url'], headers=provider_info['headers'],
+            data=orjson.dumps(data), timeout=_REQUEST_TIMEOUT, stream=True)
         
         # 检查响应
         if response.status_code != 200:
             logger.error(f"Azure OpenAI API返回错误: {response.status_code}, {response.text}")
             return f"错误: Azure OpenAI API返回 {response.status_code}"
+
+        # 流式读取响应；服务端不支持流式时按普通JSON解析
+        if 'text/event-stream' in response.headers.get('Content-Type', ''):
+            return self._read_sse_stream(response)
         
         # 解析响应
-        result = response.json()
+        result = orjson.loads(response.content)
         
         # 提取文本
         text = result.get('choices', [{}])[0].get('message', {}).get('content', '')
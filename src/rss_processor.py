@@ -2,10 +2,16 @@
 RSS处理模块，负责获取和解析RSS源
 """
 import os
-import uuid
 import logging
-import hashlib
+import secrets
 import feedparser
+from concurrent.futures import ThreadPoolExecutor
+from lxml import etree
+
+try:
+    from datasketch import MinHash, MinHashLSH
+except ImportError:
+    MinHash = None
 from datetime import datetime, timedelta
 from typing import Any, Dict, List, Optional, Tuple
 from feedgen.feed import FeedGenerator
@@ -13,7 +19,7 @@ from feedgen.feed import FeedGenerator
 from src.config_manager import ConfigManager
 from src.cache_manager import CacheManager
 from src.data_manager import DataManager
-from src.filter_manager import FilterManager
+from src.filter_manager import FilterManager, _hash_hex
 
 # 设置日志
 logging.basicConfig(
@@ -43,15 +49,105 @@ class RSSProcessor:
         
         # 获取数据目录
         self.data_dir = os.path.join(
-            self.config_manager.get_config('global.data_dir', './data'),
+            self.config_manager.data_dir,
             'rss'
         )
         
         # 确保目录存在
         os.makedirs(self.data_dir, exist_ok=True)
+
+        # 每组一个近似去重索引，跨调度周期常驻内存
+        self._lsh_indexes: Dict[str, Any] = {}
+        self._lsh_counters: Dict[str, int] = {}
         
         logger.info("RSS处理器初始化完成")
+
+    def _near_dedup(self, entries: List[Dict[str, Any]], group_name: str) -> List[Dict[str, Any]]:
+        """
+        近似去重，跳过跨源转载的相似文章
+
+        标题去重只能挡住完全相同的标题；同一篇文章被多个源转载时
+        标题往往略有差异。用MinHash对标题+摘要做3-gram相似度检索，
+        相似度超过阈值的条目直接丢弃，省下它的LLM调用
+
+        Args:
+            entries: RSS条目列表
+            group_name: RSS组名称
+
+        Returns:
+            去掉近似重复后的RSS条目列表
+        """
+        if MinHash is None or len(entries) < 2:
+            return entries
+
+        lsh = self._lsh_indexes.get(group_name)
+        if lsh is None:
+            lsh = MinHashLSH(threshold=0.8, num_perm=128)
+            self._lsh_indexes[group_name] = lsh
+
+        unique_entries = []
+
+        for entry in entries:
+            text = f"{entry.get('title', '')} {(entry.get('summary') or '')[:500]}".lower()
+
+            minhash = MinHash(num_perm=128)
+            for i in range(max(len(text) - 2, 1)):
+                minhash.update(text[i:i + 3].encode())
+
+            if lsh.query(minhash):
+                logger.debug(f"近似重复条目，跳过: {entry.get('title', '')}")
+                continue
+
+            counter = self._lsh_counters.get(group_name, 0)
+            self._lsh_counters[group_name] = counter + 1
+            lsh.insert(f"{group_name}:{counter}", minhash)
+            unique_entries.append(entry)
+
+        if len(unique_entries) < len(entries):
+            logger.info(
+                f"近似去重完成，去重前: {len(entries)}, 去重后: {len(unique_entries)}")
+
+        return unique_entries
     
+    @staticmethod
+    def _slim_feed(feed: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        提取feed中后续流程实际消费的字段
+
+        FeedParserDict携带bozo信息、HTTP头、命名空间等大量无用数据，
+        整体进缓存会让每次序列化多做3-5倍的工作；只留条目的必要字段
+
+        Args:
+            feed: feedparser解析结果
+
+        Returns:
+            只含entries列表的精简字典
+        """
+        slim_entries = []
+
+        for e in feed.get('entries', []):
+            content = e.get('content')
+            if content:
+                content = [{'value': c.get('value', '')} for c in content]
+
+            published_parsed = e.get('published_parsed')
+            updated_parsed = e.get('updated_parsed')
+
+            slim_entries.append({
+                'title': e.get('title', ''),
+                'link': e.get('link', ''),
+                'id': e.get('id', ''),
+                'author': e.get('author', ''),
+                'summary': e.get('summary', ''),
+                'content': content,
+                'published': e.get('published', ''),
+                'updated': e.get('updated', ''),
+                'published_parsed': tuple(published_parsed) if published_parsed else None,
+                'updated_parsed': tuple(updated_parsed) if updated_parsed else None,
+            })
+
+        return {'entries': slim_entries}
+
     def fetch_rss(self, rss_url: str) -> Tuple[bool, Optional[Dict[str, Any]]]:
         """
         获取RSS源
@@ -71,25 +167,66 @@ class RSSProcessor:
                 logger.info(f"使用缓存的RSS源: {rss_url}")
                 return True, cached_feed
             
+            # 条件GET：带上上次的ETag/Last-Modified，源未变化时服务器返回304
+            cond_key = f"rss:cond:{rss_url}"
+            etag = modified = cached_slim = None
+
+            conditional = self.cache_manager.get(cond_key)
+            if conditional:
+                etag, modified, cached_slim = conditional
+
             # 获取RSS源
             logger.info(f"开始获取RSS源: {rss_url}")
-            feed = feedparser.parse(rss_url)
+            feed = feedparser.parse(rss_url, etag=etag, modified=modified)
+
+            # 304意味着源自上次以来没有变化，直接复用上次的解析结果
+            if feed.get('status') == 304 and cached_slim is not None:
+                logger.info(f"RSS源未变化(304): {rss_url}")
+                self.cache_manager.set(cache_key, cached_slim, ttl=3600)
+                return True, cached_slim
             
             # 检查是否成功
             if feed.get('bozo_exception'):
                 logger.error(f"获取RSS源失败: {feed.get('bozo_exception')}")
                 return False, None
             
-            # 缓存结果
-            self.cache_manager.set(cache_key, feed, ttl=3600)  # 缓存1小时
+            # 只缓存精简后的条目数据，不缓存整个FeedParserDict
+            slim = self._slim_feed(feed)
+            self.cache_manager.set(cache_key, slim, ttl=3600)  # 缓存1小时
+
+            # 记录校验头和解析结果，供下次条件GET使用
+            self.cache_manager.set(
+                cond_key,
+                [feed.get('etag'), feed.get('modified'), slim],
+                ttl=86400
+            )
             
-            logger.info(f"获取RSS源成功: {rss_url}, 条目数: {len(feed.get('entries', []))}")
+            logger.info(f"获取RSS源成功: {rss_url}, 条目数: {len(slim['entries'])}")
             
-            return True, feed
+            return True, slim
         except Exception as e:
             logger.error(f"获取RSS源异常: {e}")
             return False, None
     
+    @staticmethod
+    def _entry_dt(entry: Dict[str, Any]) -> Optional[datetime]:
+        """
+        获取条目的发布时间datetime
+
+        优先复用预计算的_dt；缺失时现算一次并写回条目，
+        避免排序和比较反复构造相同的datetime
+
+        Args:
+            entry: RSS条目
+
+        Returns:
+            发布时间，无法确定时返回None
+        """
+        if '_dt' not in entry:
+            published_parsed = entry.get('published_parsed') or entry.get('updated_parsed')
+            entry['_dt'] = datetime(*published_parsed[:6]) if published_parsed else None
+        return entry['_dt']
+
     def deduplicate_entries(self, entries: List[Dict[str, Any]], days: int = 3) -> List[Dict[str, Any]]:
         """
         去重文章
@@ -108,23 +245,25 @@ class RSSProcessor:
         
         logger.info(f"开始去重，条目数: {len(entries)}, 时间范围: {days}天")
         
-        # 按发布时间排序
-        entries.sort(key=lambda x: x.get('published_parsed', datetime.now().timetuple()), reverse=True)
+        # 按发布时间排序（datetime只构造一次，比逐次比较struct_time便宜）
+        entries.sort(key=lambda x: self._entry_dt(x) or datetime.min, reverse=True)
         
         # 去重
         unique_entries = []
         title_time_map = {}
         
+        # 逐条日志降为DEBUG：数百条时格式化和刷盘开销会盖过去重本身
         for entry in entries:
             title = entry.get('title', '')
-            published_parsed = entry.get('published_parsed')
+            published_time = self._entry_dt(entry)
             
-            if not title or not published_parsed:
-                logger.info(f"条目缺少标题或发布时间，保留: {title}")
+            if not title or not published_time:
+                logger.debug(f"条目缺少标题或发布时间，保留: {title}")
                 unique_entries.append(entry)
                 continue
-            
-            published_time = datetime(*published_parsed[:6])
+
+            # 标题归一化后再比对，避免大小写和首尾空白造成漏判
+            title = title.strip().lower()
             
             # 检查是否已存在相同标题的条目
             if title in title_time_map:
@@ -132,13 +271,13 @@ class RSSProcessor:
                 
                 # 如果发布时间相差超过指定天数，则认为是不同的文章
                 if abs((published_time - existing_time).days) > days:
-                    logger.info(f"标题相同但发布时间相差超过{days}天，保留: {title}")
+                    logger.debug(f"标题相同但发布时间相差超过{days}天，保留: {title}")
                     unique_entries.append(entry)
                     title_time_map[title] = published_time
                 else:
-                    logger.info(f"标题相同且发布时间相近，去重: {title}")
+                    logger.debug(f"标题相同且发布时间相近，去重: {title}")
             else:
-                logger.info(f"新标题，保留: {title}")
+                logger.debug(f"新标题，保留: {title}")
                 unique_entries.append(entry)
                 title_time_map[title] = published_time
         
@@ -146,6 +285,88 @@ class RSSProcessor:
         
         return unique_entries
     
+    # 增量更新时feed文件保留的最大条目数
+    _MAX_RSS_ITEMS = 500
+
+    def _append_entries_to_rss(self, rss_file: str, entries: List[Dict[str, Any]]) -> bool:
+        """
+        把新条目增量插入已有的RSS文件
+
+        完整重建会重新序列化整个feed；增量路径只解析现有XML、
+        在channel头部插入新item并截断超限的旧item，成本与新条目数成正比
+
+        Args:
+            rss_file: RSS文件路径
+            entries: 新条目列表
+
+        Returns:
+            是否增量更新成功（失败时调用方回退为完整重建）
+        """
+        try:
+            tree = etree.parse(rss_file)
+            channel = tree.find('channel')
+            if channel is None:
+                return False
+
+            # 已有条目的guid集合，防止重复插入
+            existing_ids = {guid.text for guid in channel.iterfind('item/guid')}
+
+            first_item = channel.find('item')
+            insert_pos = (list(channel).index(first_item)
+                          if first_item is not None else len(channel))
+
+            # 逆序插入，最新的条目最终排在最前
+            for entry in reversed(entries):
+                entry_id = entry.get('id', '')
+                if not entry_id:
+                    entry_id = _hash_hex(entry.get('title', '').encode())
+
+                if entry_id in existing_ids:
+                    continue
+
+                item = etree.Element('item')
+
+                etree.SubElement(item, 'title').text = entry.get('title', '')
+
+                guid = etree.SubElement(item, 'guid')
+                guid.text = entry_id
+                guid.set('isPermaLink', 'false')
+
+                link = entry.get('link', '')
+                if link:
+                    etree.SubElement(item, 'link').text = link
+
+                published = entry.get('published', '')
+                if published:
+                    etree.SubElement(item, 'pubDate').text = published
+
+                author = entry.get('author', '')
+                if author:
+                    etree.SubElement(item, 'author').text = author
+
+                content = entry.get('content', '')
+                if isinstance(content, dict):
+                    content = content.get('value', '')
+                elif isinstance(content, list) and len(content) > 0:
+                    content = content[0].get('value', '')
+
+                description = entry.get('summary', '') or content
+                if description:
+                    etree.SubElement(item, 'description').text = description
+
+                channel.insert(insert_pos, item)
+                existing_ids.add(entry_id)
+
+            # 截断到条目上限，控制文件大小
+            for extra in channel.findall('item')[self._MAX_RSS_ITEMS:]:
+                channel.remove(extra)
+
+            tree.write(rss_file, xml_declaration=True, encoding='utf-8')
+            return True
+        except Exception as e:
+            logger.warning(f"增量更新RSS文件失败: {e}")
+            return False
+
     def generate_rss(self, entries: List[Dict[str, Any]], group_name: str) -> Tuple[bool, Optional[str]]:
         """
         生成新的RSS源
@@ -159,6 +380,15 @@ class RSSProcessor:
         """
         try:
             logger.info(f"开始生成RSS源: {group_name}, 条目数: {len(entries)}")
+
+            rss_file = os.path.join(self.data_dir, f"{group_name}.xml")
+
+            # 已有feed文件时走增量路径，只序列化新条目
+            if os.path.exists(rss_file):
+                if self._append_entries_to_rss(rss_file, entries):
+                    logger.info(f"增量更新RSS源成功: {group_name}, 文件路径: {rss_file}")
+                    return True, rss_file
+                logger.warning(f"增量更新失败，回退为完整重建: {group_name}")
             
             # 创建Feed生成器
             fg = FeedGenerator()
@@ -171,7 +401,8 @@ class RSSProcessor:
             fg.language('zh-cn')
             
             # 添加安全随机字符串
-            random_suffix = hashlib.md5(str(uuid.uuid4()).encode()).hexdigest()[:8]
+            # 只需要8个随机十六进制字符，直接取随机字节，省掉UUID+MD5
+            random_suffix = secrets.token_hex(4)
             fg.id(f"ai-rss-filter:{group_name}:{random_suffix}")
             
             # 添加条目
@@ -181,7 +412,7 @@ class RSSProcessor:
                 # 设置条目ID
                 entry_id = entry.get('id', '')
                 if not entry_id:
-                    entry_id = hashlib.md5(entry.get('title', '').encode()).hexdigest()
+                    entry_id = _hash_hex(entry.get('title', '').encode())
                 fe.id(entry_id)
                 
                 # 设置标题
@@ -225,7 +456,6 @@ class RSSProcessor:
                     fe.content(content, type='html')
             
             # 生成RSS文件
-            rss_file = os.path.join(self.data_dir, f"{group_name}.xml")
             fg.rss_file(rss_file)
             
             logger.info(f"生成RSS源成功: {group_name}, 文件路径: {rss_file}")
@@ -270,12 +500,16 @@ class RSSProcessor:
         if last_update:
             logger.info(f"RSS组 {group_name} 最后更新时间: {last_update}")
         
-        # 获取所有RSS源
+        # 并发抓取所有RSS源：抓取是纯网络IO，总耗时从各源之和降到最慢一个
+        if len(rss_urls) > 1:
+            with ThreadPoolExecutor(max_workers=min(len(rss_urls), 16)) as executor:
+                fetch_results = list(executor.map(self.fetch_rss, rss_urls))
+        else:
+            fetch_results = [self.fetch_rss(rss_urls[0])]
+
         all_entries = []
         
-        for rss_url in rss_urls:
-            success, feed = self.fetch_rss(rss_url)
-            
+        for rss_url, (success, feed) in zip(rss_urls, fetch_results):
             if not success or not feed:
                 logger.warning(f"获取RSS源 {rss_url} 失败，跳过")
                 continue
@@ -283,26 +517,28 @@ class RSSProcessor:
             # 提取条目
             entries = feed.get('entries', [])
             logger.info(f"获取到条目数: {len(entries)}, URL: {rss_url}")
+
+            # 预先解析发布时间，后续过滤和去重直接复用
+            for entry in entries:
+                self._entry_dt(entry)
             
             # 如果有最后更新时间，则只处理新条目
             if last_update:
                 new_entries = []
                 
                 for entry in entries:
-                    published_parsed = entry.get('published_parsed')
+                    published_time = entry['_dt']
                     
-                    if published_parsed:
-                        published_time = datetime(*published_parsed[:6])
-                        
+                    if published_time:
                         # 如果发布时间晚于最后更新时间，则认为是新条目
                         if published_time > last_update:
-                            logger.info(f"新条目: {entry.get('title', '')}, 发布时间: {published_time}")
+                            logger.debug(f"新条目: {entry.get('title', '')}, 发布时间: {published_time}")
                             new_entries.append(entry)
                         else:
-                            logger.info(f"旧条目，跳过: {entry.get('title', '')}, 发布时间: {published_time}")
+                            logger.debug(f"旧条目，跳过: {entry.get('title', '')}, 发布时间: {published_time}")
                     else:
                         # 如果没有发布时间，则默认保留
-                        logger.info(f"条目没有发布时间，默认保留: {entry.get('title', '')}")
+                        logger.debug(f"条目没有发布时间，默认保留: {entry.get('title', '')}")
                         new_entries.append(entry)
                 
                 logger.info(f"增量更新，新条目数: {len(new_entries)}, URL: {rss_url}")
@@ -320,6 +556,11 @@ class RSSProcessor:
         # 去重
         if dedup_enabled:
             all_entries = self.deduplicate_entries(all_entries, dedup_days)
+            all_entries = self._near_dedup(all_entries, group_name)
+
+            if not all_entries:
+                logger.warning(f"RSS组 {group_name} 去重后没有剩余条目")
+                return False, None
         
         # 过滤和生成摘要
         processed_entries = self.filter_manager.batch_process_entries(all_entries, group_name)
@@ -331,9 +572,8 @@ class RSSProcessor:
         
         logger.info(f"处理后的条目数: {len(processed_entries)}")
         
-        # 保存条目到数据库
-        for entry in processed_entries:
-            self.data_manager.save_entry(entry, group_name)
+        # 批量保存条目到数据库，一次事务代替逐条提交
+        self.data_manager.save_entries(processed_entries, group_name)
         
         # 更新最后更新时间
         self.data_manager.update_last_update_time(group_name)
@@ -3,7 +3,10 @@
 """
 import logging
 import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Optional
+from apscheduler.executors.pool import ThreadPoolExecutor as APSThreadPoolExecutor
+from apscheduler.jobstores.memory import MemoryJobStore
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.interval import IntervalTrigger
 
@@ -34,17 +37,45 @@ class SchedulerManager:
         self.rss_processor = rss_processor
         self.data_manager = data_manager
         
+        # 显式线程池执行器：组任务并行执行，默认10线程在组多时会排队误点
+        # 任务主体是网络IO（抓取feed、调LLM），线程即可并行；
+        # 进程池反而要求任务可pickle，而处理器持有SQLite长连接和HTTP会话。
+        # 保留APScheduler而不自写heapq调度循环：任务量只有组数+1，
+        # 调度本身远不是瓶颈，而misfire/coalesce/一次性触发语义自写容易出错
+        max_workers = self.config_manager.get_config('scheduler.max_workers', 20)
+
         # 创建调度器
-        self.scheduler = BackgroundScheduler()
+        self.scheduler = BackgroundScheduler(
+            # 任务表只在进程内有意义（重启后由配置重建），显式用内存存储，避免任何序列化开销
+            jobstores={'default': MemoryJobStore()},
+            executors={'default': APSThreadPoolExecutor(max_workers=max_workers)},
+            job_defaults={
+                'coalesce': True,        # 积压的多次触发合并为一次补跑
+                'max_instances': 1,      # 同一任务不重叠执行
+                'misfire_grace_time': 300
+            }
+        )
         
         # 任务映射
         self.jobs: Dict[str, str] = {}
         
-        # 锁，防止并发问题
-        self.lock = threading.Lock()
+        # 8路分片锁：不同组的任务管理互不阻塞，仅同组操作串行
+        self._locks = [threading.Lock() for _ in range(8)]
         
         logger.info("调度管理器初始化完成")
     
+    def _lock_for(self, group_name: str) -> threading.Lock:
+        """
+        获取组名对应的分片锁
+
+        Args:
+            group_name: RSS组名称
+
+        Returns:
+            该组操作使用的锁
+        """
+        return self._locks[hash(group_name) & 7]
+
     def start(self) -> None:
         """启动调度器"""
         # 添加数据清理任务
@@ -80,8 +111,15 @@ class SchedulerManager:
         # 获取所有RSS组
         groups = self.config_manager.get_all_groups()
         
-        for group_name in groups:
-            self.add_job(group_name)
+        if not groups:
+            return
+        
+        # 并发注册：组多时串行注册拖慢启动，分片锁保证同组操作安全
+        if len(groups) == 1:
+            self.add_job(groups[0])
+        else:
+            with ThreadPoolExecutor(max_workers=min(32, len(groups))) as executor:
+                list(executor.map(self.add_job, groups))
     
     def add_job(self, group_name: str, interval: Optional[int] = None) -> bool:
         """
@@ -93,12 +131,16 @@ class SchedulerManager:
         
         Returns:
             是否添加成功
+
+        Note:
+            每个任务显式设置coalesce/max_instances防止重叠执行，
+            misfire宽限期按更新间隔的一半计算
         """
-        with self.lock:
+        with self._lock_for(group_name):
             # 获取组配置
             group_config = self.config_manager.get_group_config(group_name)
             if not group_config:
-                logger.error(f"RSS组 {group_name} 不存在")
+                logger.error("RSS组 %s 不存在", group_name)
                 return False
             
             # 获取更新间隔
@@ -107,29 +149,32 @@ class SchedulerManager:
             
             # 确保间隔是正整数
             if not isinstance(interval, int) or interval <= 0:
-                logger.warning(f"更新间隔必须是正整数，使用默认值60")
+                logger.warning("更新间隔必须是正整数，使用默认值60")
                 interval = 60
             
             # 创建任务ID
             job_id = f"rss_job_{group_name}"
             
-            # 如果任务已存在，则移除
+            # 如果任务已存在，则移除（已持有本组的锁，走无锁内部路径）
             if job_id in self.jobs:
-                self.remove_job(group_name)
+                self._remove_job_locked(group_name)
             
-            # 添加任务
+            # 添加任务：同组不重叠、积压合并为一次补跑，misfire宽限随间隔伸缩
             self.scheduler.add_job(
                 self._process_group,
                 args=[group_name],
                 trigger=IntervalTrigger(minutes=interval),
                 id=job_id,
-                replace_existing=True
+                replace_existing=True,
+                coalesce=True,
+                max_instances=1,
+                misfire_grace_time=max(60, interval * 60 // 2)
             )
             
             # 记录任务
             self.jobs[job_id] = group_name
             
-            logger.info(f"已添加RSS处理任务: {group_name}，更新间隔: {interval}分钟")
+            logger.info("已添加RSS处理任务: %s，更新间隔: %s分钟", group_name, interval)
             
             return True
     
@@ -143,24 +188,71 @@ class SchedulerManager:
         Returns:
             是否移除成功
         """
-        with self.lock:
-            # 创建任务ID
-            job_id = f"rss_job_{group_name}"
-            
-            # 如果任务不存在，则返回失败
-            if job_id not in self.jobs:
-                logger.warning(f"RSS处理任务不存在: {group_name}")
-                return False
-            
-            # 移除任务
-            self.scheduler.remove_job(job_id)
-            
-            # 移除记录
-            del self.jobs[job_id]
-            
-            logger.info(f"已移除RSS处理任务: {group_name}")
-            
-            return True
+        with self._lock_for(group_name):
+            return self._remove_job_locked(group_name)
+
+    def _remove_job_locked(self, group_name: str) -> bool:
+        """
+        移除任务（调用方必须已持有该组的分片锁）
+
+        Args:
+            group_name: RSS组名称
+
+        Returns:
+            是否移除成功
+        """
+        # 创建任务ID
+        job_id = f"rss_job_{group_name}"
+        
+        # 如果任务不存在，则返回失败
+        if job_id not in self.jobs:
+            logger.warning("RSS处理任务不存在: %s", group_name)
+            return False
+        
+        # 移除任务
+        self.scheduler.remove_job(job_id)
+        
+        # 移除记录
+        del self.jobs[job_id]
+        
+        logger.info("已移除RSS处理任务: %s", group_name)
+        
+        return True
+    
+    def trigger_now(self, group_name: str) -> Optional[str]:
+        """
+        立即触发一次组处理（异步执行）
+        
+        向调度器推入一个一次性date任务，由调度器线程池执行，调用方不阻塞。
+        
+        Args:
+            group_name: RSS组名称
+        
+        Returns:
+            任务ID，失败时返回None
+        """
+        group_config = self.config_manager.get_group_config(group_name)
+        if not group_config:
+            logger.error(f"RSS组 {group_name} 不存在")
+            return None
+        
+        job_id = f"manual_{group_name}"
+        
+        try:
+            self.scheduler.add_job(
+                self._process_group,
+                args=[group_name],
+                trigger='date',  # 不指定run_date即立即执行
+                id=job_id,
+                replace_existing=True,
+                misfire_grace_time=None
+            )
+        except Exception as e:
+            logger.error(f"触发手动处理失败: {group_name}, {e}")
+            return None
+        
+        logger.info(f"已触发手动处理: {group_name}")
+        return job_id
     
     def update_job(self, group_name: str, interval: int) -> bool:
         """
@@ -186,14 +278,15 @@ class SchedulerManager:
         Args:
             group_name: RSS组名称
         """
-        logger.info(f"开始处理RSS组: {group_name}")
+        # 每次任务触发都会走这里，%s延迟格式化避免日志级别关闭时的无谓拼串
+        logger.info("开始处理RSS组: %s", group_name)
         
         try:
             success, rss_file = self.rss_processor.process_group(group_name)
             
             if success:
-                logger.info(f"处理RSS组成功: {group_name}，生成文件: {rss_file}")
+                logger.info("处理RSS组成功: %s，生成文件: %s", group_name, rss_file)
             else:
-                logger.warning(f"处理RSS组失败: {group_name}")
+                logger.warning("处理RSS组失败: %s", group_name)
         except Exception as e:
-            logger.error(f"处理RSS组异常: {group_name}, {e}")
+            logger.error("处理RSS组异常: %s, %s", group_name, e)
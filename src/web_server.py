@@ -2,71 +2,27 @@
 Web服务模块，提供RSS订阅链接
 """
 import os
+import time
 import logging
-from typing import Dict, Optional
-from flask import Flask, send_file, jsonify, request, Response
-from werkzeug.serving import run_simple
+import orjson
+import functools
+import threading
+from concurrent.futures import Future
+from typing import Dict, List, Optional, Tuple
+from flask import Flask, send_from_directory, jsonify, request, Response
+from markupsafe import escape
+from waitress.server import create_server
 
 from src.config_manager import ConfigManager
 from src.data_manager import DataManager
 from src.rss_processor import RSSProcessor
 from src.scheduler_manager import SchedulerManager
 
-# 设置日志
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+# 日志配置由先导入的模块完成，这里只取logger
 logger = logging.getLogger(__name__)
 
-class WebServer:
-    """Web服务类，提供RSS订阅链接"""
-    
-    def __init__(self, config_manager: ConfigManager, data_manager: DataManager, 
-                rss_processor: RSSProcessor, scheduler_manager: SchedulerManager):
-        """
-        初始化Web服务器
-        
-        Args:
-            config_manager: 配置管理器实例
-            data_manager: 数据管理器实例
-            rss_processor: RSS处理器实例
-            scheduler_manager: 调度管理器实例
-        """
-        self.config_manager = config_manager
-        self.data_manager = data_manager
-        self.rss_processor = rss_processor
-        self.scheduler_manager = scheduler_manager
-        
-        # 获取Web配置
-        self.host = config_manager.get_config('web.host', '0.0.0.0')
-        self.port = config_manager.get_config('web.port', 8000)
-        
-        # 获取数据目录
-        self.data_dir = os.path.join(
-            self.config_manager.get_config('global.data_dir', './data'),
-            'rss'
-        )
-        
-        # 创建Flask应用
-        self.app = Flask(__name__)
-        
-        # 注册路由
-        self._register_routes()
-        
-        # 服务器实例
-        self.server = None
-        
-        logger.info("Web服务器初始化完成")
-    
-    def _register_routes(self) -> None:
-        """注册路由"""
-        # 首页
-        @self.app.route('/')
-        def index():
-            groups = self.config_manager.get_all_groups()
-            
-            html = """
+# 首页HTML的固定部分，模块加载时就绪，渲染时只拼接组列表
+_INDEX_HEADER = """
             <!DOCTYPE html>
             <html>
             <head>
@@ -105,97 +61,354 @@ class WebServer:
                 <p>可用的RSS订阅源:</p>
                 <ul>
             """
-            
-            for group in groups:
-                rss_url = f"/rss/{group}"
-                html += f'<li><a href="{rss_url}">{group}</a></li>'
-            
-            html += """
+
+_INDEX_FOOTER = """
                 </ul>
             </body>
             </html>
             """
-            
-            return html
-        
-        # RSS订阅源
-        @self.app.route('/rss/<group_name>')
-        def get_rss(group_name):
-            # 检查组是否存在
-            group_config = self.config_manager.get_group_config(group_name)
-            if not group_config:
-                return jsonify({"error": f"RSS组 {group_name} 不存在"}), 404
-            
-            # 检查RSS文件是否存在
-            rss_file = os.path.join(self.data_dir, f"{group_name}.xml")
-            if not os.path.exists(rss_file):
+
+# 健康检查响应体固定不变，进程启动时编码一次
+_HEALTH_BODY = orjson.dumps({"status": "ok"})
+
+@functools.lru_cache(maxsize=256)
+def _group_not_found_body(group_name: str) -> bytes:
+    """
+    组不存在的404响应体（按组名缓存序列化结果）
+
+    Args:
+        group_name: RSS组名称
+
+    Returns:
+        序列化好的JSON字节
+    """
+    return orjson.dumps({"error": f"RSS组 {group_name} 不存在"})
+
+class WebServer:
+    """Web服务类，提供RSS订阅链接"""
+    
+    def __init__(self, config_manager: ConfigManager, data_manager: DataManager, 
+                rss_processor: RSSProcessor, scheduler_manager: SchedulerManager):
+        """
+        初始化Web服务器
+        
+        Args:
+            config_manager: 配置管理器实例
+            data_manager: 数据管理器实例
+            rss_processor: RSS处理器实例
+            scheduler_manager: 调度管理器实例
+        """
+        self.config_manager = config_manager
+        self.data_manager = data_manager
+        self.rss_processor = rss_processor
+        self.scheduler_manager = scheduler_manager
+        
+        # 获取Web配置
+        self.host = config_manager.web_host
+        self.port = config_manager.web_port
+        
+        # 获取数据目录
+        self.data_dir = os.path.join(
+            self.config_manager.data_dir,
+            'rss'
+        )
+        
+        # 创建Flask应用
+        self.app = Flask(__name__)
+        
+        # 注册路由
+        self._register_routes()
+        
+        # 组配置缓存（以配置版本号为戳）：配置保存后版本递增，缓存自动失效。
+        # 不用functools.lru_cache，因为它无法感知配置变更
+        self._group_config_cache: Dict[str, tuple] = {}
+        self._groups_cache: tuple = (-1, [])
+        self._index_cache: tuple = (-1, b'')
+        
+        # RSS文件存在性缓存：组名 -> (有效期截止时间, 文件路径)，5秒内免stat
+        self._rss_path_cache: Dict[str, tuple] = {}
+        
+        # 预计算各组RSS文件的完整路径，配置外的组在请求时按需补充
+        self._rss_paths: Dict[str, str] = {
+            group: os.path.join(self.data_dir, f"{group}.xml")
+            for group in config_manager.get_all_groups()
+        }
+        
+        # 已生成的RSS文件名集合：启动时从目录快照，处理成功后增量维护；
+        # 集合未命中时仍回退os.path.exists，文件可能被外部删除或补建
+        try:
+            self._available_files = set(os.listdir(self.data_dir))
+        except OSError:
+            self._available_files = set()
+        
+        # 条目计数缓存：(组名, 是否只数已过滤) -> (有效期截止时间, 计数)
+        self._count_cache: Dict[tuple, tuple] = {}
+        
+        # 进行中的组处理：并发请求共享同一次process_group执行
+        self._inflight: Dict[str, Future] = {}
+        self._inflight_lock = threading.Lock()
+        
+        # 服务器实例
+        self.server = None
+        
+        logger.info("Web服务器初始化完成")
+    
+    def _cached_group_config(self, group_name: str) -> Dict:
+        """
+        获取组配置（带版本戳缓存）
+        
+        Args:
+            group_name: RSS组名称
+        
+        Returns:
+            RSS组的配置字典
+        """
+        version = self.config_manager.version
+        cached = self._group_config_cache.get(group_name)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        
+        group_config = self.config_manager.get_group_config(group_name)
+        
+        # 只缓存已配置的组：组名来自外部URL，缓存未知组名会让
+        # 扫描类请求把这个字典撑到无界
+        if group_config:
+            self._group_config_cache[group_name] = (version, group_config)
+        
+        return group_config
+    
+    def _cached_groups(self) -> List[str]:
+        """
+        获取所有组名（带版本戳缓存）
+        
+        Returns:
+            RSS组名称列表
+        """
+        version = self.config_manager.version
+        if self._groups_cache[0] != version:
+            self._groups_cache = (version, self.config_manager.get_all_groups())
+        return self._groups_cache[1]
+    
+    def _render_index(self) -> bytes:
+        """
+        渲染首页HTML
+
+        Returns:
+            编码后的HTML字节
+        """
+        parts = [_INDEX_HEADER]
+        
+        for group in self._cached_groups():
+            group = escape(group)
+            parts.append(f'<li><a href="/rss/{group}">{group}</a></li>')
+        
+        parts.append(_INDEX_FOOTER)
+        
+        return ''.join(parts).encode('utf-8')
+    
+    def _cached_entry_count(self, group_name: str, filtered_only: bool = False) -> int:
+        """
+        获取组条目数（带30秒TTL缓存）
+        
+        Args:
+            group_name: RSS组名称
+            filtered_only: 是否只统计已过滤的条目
+        
+        Returns:
+            条目数量
+        """
+        now = time.monotonic()
+        key = (group_name, filtered_only)
+        cached = self._count_cache.get(key)
+        if cached is not None and cached[0] > now:
+            return cached[1]
+        
+        count = self.data_manager.get_entry_count(group_name, filtered_only=filtered_only)
+        self._count_cache[key] = (now + 30, count)
+        return count
+    
+    def _invalidate_counts(self, group_name: str) -> None:
+        """
+        使组的条目计数缓存失效（处理完成后调用）
+        
+        Args:
+            group_name: RSS组名称
+        """
+        self._count_cache.pop((group_name, False), None)
+        self._count_cache.pop((group_name, True), None)
+    
+    def _process_once(self, group_name: str) -> Tuple[bool, Optional[str]]:
+        """
+        执行一次组处理（single-flight）
+        
+        同一组的并发调用只触发一次process_group，其余调用等待并共享结果。
+        
+        Args:
+            group_name: RSS组名称
+        
+        Returns:
+            (是否成功, RSS文件路径)
+        """
+        with self._inflight_lock:
+            future = self._inflight.get(group_name)
+            if future is not None:
+                owner = False
+            else:
+                future = Future()
+                self._inflight[group_name] = future
+                owner = True
+        
+        if not owner:
+            # 等待进行中的那次处理完成，直接复用其结果
+            return future.result()
+        
+        try:
+            result = self.rss_processor.process_group(group_name)
+            if result[0]:
+                self._invalidate_counts(group_name)
+                self._available_files.add(f"{group_name}.xml")
+        except Exception as e:
+            logger.error(f"处理RSS组异常: {group_name}, {e}")
+            result = (False, None)
+        finally:
+            with self._inflight_lock:
+                self._inflight.pop(group_name, None)
+        
+        future.set_result(result)
+        return result
+    
+    def _register_routes(self) -> None:
+        """注册路由"""
+        # 视图用绑定方法而不是每实例闭包：方法查找走类字典，且便于复用内部缓存
+        self.app.add_url_rule('/', view_func=self._view_index)
+        self.app.add_url_rule('/rss/<group_name>', view_func=self._view_rss)
+        self.app.add_url_rule('/update/<group_name>', view_func=self._view_update, methods=['POST'])
+        self.app.add_url_rule('/groups', view_func=self._view_groups)
+        self.app.add_url_rule('/health', view_func=self._view_health)
+    
+    def _view_index(self):
+        """首页"""
+        # 页面只随组列表变化，按配置版本号缓存渲染好的字节
+        version = self.config_manager.version
+        if self._index_cache[0] != version:
+            self._index_cache = (version, self._render_index())
+        
+        return Response(self._index_cache[1], mimetype='text/html')
+    
+    def _view_rss(self, group_name):
+        """RSS订阅源"""
+        # 检查组是否存在
+        group_config = self._cached_group_config(group_name)
+        if not group_config:
+            # 404体按组名缓存序列化结果，Response对象仍每次新建
+            return Response(_group_not_found_body(group_name), status=404,
+                            mimetype='application/json')
+        
+        # 检查RSS文件是否存在（存在性判断带5秒TTL缓存，免去每请求一次stat）
+        now = time.monotonic()
+        cached = self._rss_path_cache.get(group_name)
+        if cached is not None and cached[0] > now:
+            rss_file = cached[1]
+        else:
+            filename = f"{group_name}.xml"
+            rss_file = self._rss_paths.get(group_name)
+            if rss_file is None:
+                rss_file = os.path.join(self.data_dir, filename)
+                self._rss_paths[group_name] = rss_file
+            if filename not in self._available_files and not os.path.exists(rss_file):
                 # 尝试生成RSS文件
-                success, _ = self.rss_processor.process_group(group_name)
+                success, _ = self._process_once(group_name)
                 
                 if not success:
                     return jsonify({"error": f"生成RSS源失败: {group_name}"}), 500
+            else:
+                self._available_files.add(filename)
             
-            # 返回RSS文件
-            return send_file(rss_file, mimetype='application/rss+xml')
-        
-        # 手动更新RSS
-        @self.app.route('/update/<group_name>', methods=['POST'])
-        def update_rss(group_name):
-            # 检查组是否存在
-            group_config = self.config_manager.get_group_config(group_name)
-            if not group_config:
-                return jsonify({"error": f"RSS组 {group_name} 不存在"}), 404
+            self._rss_path_cache[group_name] = (now + 5, rss_file)
+        
+        # conditional=True由werkzeug生成ETag/Last-Modified并处理304，
+        # send_from_directory同时对文件名做路径穿越检查
+        return send_from_directory(
+            self.data_dir,
+            f"{group_name}.xml",
+            mimetype='application/rss+xml',
+            conditional=True,
+            max_age=60
+        )
+    
+    def _view_update(self, group_name):
+        """手动更新RSS"""
+        # 检查组是否存在
+        group_config = self._cached_group_config(group_name)
+        if not group_config:
+            # 404体按组名缓存序列化结果，Response对象仍每次新建
+            return Response(_group_not_found_body(group_name), status=404,
+                            mimetype='application/json')
+        
+        # 异步触发：把处理推给调度器线程池，立即返回202
+        if self.scheduler_manager is not None:
+            job_id = self.scheduler_manager.trigger_now(group_name)
             
-            # 处理RSS组
-            success, rss_file = self.rss_processor.process_group(group_name)
+            if job_id is None:
+                return jsonify({"success": False, "message": f"触发更新失败: {group_name}"}), 500
             
-            if success:
-                return jsonify({"success": True, "message": f"更新RSS源成功: {group_name}", "file": rss_file})
-            else:
-                return jsonify({"success": False, "message": f"更新RSS源失败: {group_name}"}), 500
+            self._invalidate_counts(group_name)
+            return jsonify({"success": True, "message": f"已触发更新: {group_name}", "job_id": job_id}), 202
         
-        # 获取组信息
-        @self.app.route('/groups')
-        def get_groups():
-            groups = self.config_manager.get_all_groups()
-            
-            result = {}
-            for group in groups:
-                group_config = self.config_manager.get_group_config(group)
-                entry_count = self.data_manager.get_entry_count(group)
-                filtered_count = self.data_manager.get_entry_count(group, filtered_only=True)
-                
-                result[group] = {
-                    "config": group_config,
-                    "entry_count": entry_count,
-                    "filtered_count": filtered_count
-                }
+        # 无调度器时退回同步处理
+        success, rss_file = self._process_once(group_name)
+        
+        if success:
+            return jsonify({"success": True, "message": f"更新RSS源成功: {group_name}", "file": rss_file})
+        else:
+            return jsonify({"success": False, "message": f"更新RSS源失败: {group_name}"}), 500
+    
+    def _view_groups(self):
+        """获取组信息"""
+        groups = self._cached_groups()
+        
+        result = {}
+        for group in groups:
+            group_config = self._cached_group_config(group)
+            entry_count = self._cached_entry_count(group)
+            filtered_count = self._cached_entry_count(group, filtered_only=True)
             
-            return jsonify(result)
+            result[group] = {
+                "config": group_config,
+                "entry_count": entry_count,
+                "filtered_count": filtered_count
+            }
         
-        # 健康检查
-        @self.app.route('/health')
-        def health_check():
-            return jsonify({"status": "ok"})
+        return jsonify(result)
+    
+    def _view_health(self):
+        """健康检查"""
+        return Response(_HEALTH_BODY, mimetype='application/json')
     
     def start(self) -> None:
         """启动服务器"""
         logger.info(f"启动Web服务器: {self.host}:{self.port}")
         
-        # 使用线程启动服务器
-        import threading
+        # 使用waitress（生产级多线程WSGI服务器）代替werkzeug开发服务器
+        self.server = create_server(
+            self.app,
+            host=self.host,
+            port=self.port,
+            threads=max(8, (os.cpu_count() or 4) * 2)
+        )
+        
         self.server_thread = threading.Thread(
-            target=run_simple,
-            args=(self.host, self.port, self.app),
-            kwargs={'threaded': True},
+            target=self.server.run,
             daemon=True
         )
         self.server_thread.start()
     
     def stop(self) -> None:
         """停止服务器"""
-        # Flask开发服务器没有优雅的停止方法
-        # 在生产环境中，应该使用更健壮的WSGI服务器
+        if self.server is not None:
+            self.server.close()
+            self.server = None
+        
         logger.info("停止Web服务器")
     
     def get_rss_url(self, group_name: str) -> str: